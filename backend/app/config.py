@@ -1,12 +1,72 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 class Settings(BaseSettings):
     database_url: str = Field(..., alias="DATABASE_URL")
+    # Bounds how long a request (or /ready) waits on an unreachable database
+    database_connect_timeout_seconds: int = 10
+    # Optional streaming replica for search and listing reads. After a
+    # write, a client's reads check for this long that the replica has
+    # replayed it, and go to the primary until it has.
+    database_read_url: Optional[str] = Field(None, alias="DATABASE_READ_URL")
+    read_your_writes_seconds: float = 5.0
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24
 
+    # Vector index storage: "none" (full float32), "halfvec" or "binary".
+    # Compact modes index a quantized expression and re-rank exactly.
+    embedding_quantization: str = "none"
+    rerank_candidates_factor: int = 10
+    # Minimum nearest-chunk pool that document-collapsed search groups over
+    grouped_search_candidates: int = 200
+
+    # Nearest-neighbour backend: "pgvector" or "numpy" (per-tenant memory-mapped files)
+    vector_store_backend: str = "pgvector"
+    vector_store_path: str = "./data/vector_store"
+
+    # Original uploaded files, content-addressed by SHA-256. With a prefix
+    # set, downloads are handed to the front proxy (nginx X-Accel-Redirect
+    # to <prefix><relative blob path>) instead of being sent by the worker.
+    blob_store_path: str = "./data/blobs"
+    blob_accel_redirect_prefix: Optional[str] = None
+
+    # Background status/risk recomputation from expiry_date (0 disables)
+    status_refresh_interval_seconds: int = 900
+    status_refresh_batch_size: int = 500
+    status_refresh_max_batches: int = 200
+    status_refresh_batch_pause_ms: int = 50
+    status_refresh_lock_timeout_ms: int = 200
+    status_refresh_statement_timeout_ms: int = 5000
+
+    # Batched chunk reclaim after a document is deleted
+    deletion_batch_size: int = 1000
+    deletion_batch_pause_ms: int = 20
+    deletion_sweep_interval_seconds: int = 300
+
+    # Per-tenant admission control: token bucket (rate/burst) and concurrency
+    # cap per request class, plus a per-process cap on requests in flight.
+    # Buckets live in memory, or in Postgres ("postgres") across workers.
+    admission_enabled: bool = True
+    admission_backend: str = "memory"
+    admission_max_inflight: int = 64
+    ingest_rate_per_second: float = 2.0
+    ingest_burst: int = 20
+    ingest_max_concurrent: int = 4
+    search_rate_per_second: float = 20.0
+    search_burst: int = 60
+    search_max_concurrent: int = 8
+
+    # Embedding model every tenant should be searched with (see
+    # services/embeddings.py). Tenants on another model are re-embedded in
+    # the background, in throttled batches, and cut over once complete.
+    embedding_model: str = "hash-v1"
+    reembed_interval_seconds: int = 60
+    reembed_batch_size: int = 500
+    reembed_batch_pause_ms: int = 50
+    reembed_max_batches_per_run: int = 200
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
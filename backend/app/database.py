@@ -1,13 +1,33 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import re
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 
 from .config import settings
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        connect_args={"connect_timeout": settings.database_connect_timeout_seconds},
+    )
+
+
+engine = _create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only traffic (search, listing, detail) goes to DATABASE_READ_URL, a
+# streaming replica, when set; otherwise to the primary like everything else
+read_engine = _create_engine(settings.database_read_url) if settings.database_read_url else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 class Base(DeclarativeBase):
     pass
 
@@ -20,14 +40,98 @@ def get_db():
         db.close()
 
 
-def init_db() -> None:
-    from . import models  # noqa: F401
+# Read-your-writes: after a write the client is handed the primary's WAL
+# position, as a cookie and a response header, and sends it back with its
+# reads. Those go to the primary until the replica has replayed past it.
+# The marker travels with the client, so it holds whichever worker serves
+# the next request.
+WRITE_LSN_COOKIE = "write_lsn"
+WRITE_LSN_HEADER = "X-Write-LSN"
+_LSN = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+
+def primary_write_lsn(db) -> Optional[str]:
+    """WAL position covering the writes the caller has committed; None without a replica"""
+    if read_engine is engine:
+        return None
+    return db.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+
+
+def replica_caught_up(lsn: str) -> bool:
+    """Whether the replica has replayed the primary's WAL up to `lsn`"""
     try:
-        with engine.connect() as conn:
-            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
-            conn.commit()
-        Base.metadata.create_all(bind=engine)
-        print("Database initialized successfully")
-    except Exception as e:
-        print(f"Warning: Database initialization failed: {e}")
-        print("This is expected if PostgreSQL is not running. The app will continue without database connectivity.")
+        with read_engine.connect() as conn:
+            return bool(conn.execute(
+                text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"), {"lsn": lsn}
+            ).scalar())
+    except SQLAlchemyError:
+        return False
+
+
+def read_session_factory(write_lsn: Optional[str] = None) -> sessionmaker:
+    """
+    Session factory for reads: the replica, unless it has not yet replayed
+    the client's last write (`write_lsn`, from `primary_write_lsn`)
+    """
+    if read_engine is engine:
+        return SessionLocal
+    if write_lsn and _LSN.match(write_lsn) and not replica_caught_up(write_lsn):
+        return SessionLocal
+    return ReadSessionLocal
+
+
+@contextmanager
+def read_session(write_lsn: Optional[str] = None) -> Iterator[Session]:
+    """
+    Read session from `read_session_factory`, closed on exit. Streamed
+    bodies open their own: dependency sessions are closed before a
+    streamed body is sent.
+    """
+    db = read_session_factory(write_lsn)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+def alembic_config():
+    from alembic.config import Config
+    return Config(str(ALEMBIC_INI))
+
+
+@lru_cache
+def schema_head() -> str:
+    """Latest migration revision; read once, on first use"""
+    from alembic.script import ScriptDirectory
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_schema_version(conn) -> Optional[str]:
+    if not inspect(conn).has_table("alembic_version"):
+        return None
+    return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def migrate_db() -> None:
+    """
+    Bring the schema up to the latest migration and create the embedding
+    index for the configured EMBEDDING_QUANTIZATION (dropping those of other
+    modes). Run once per deploy (scripts/migrate_db.py), not from API worker
+    startup.
+    """
+    from alembic import command
+    from .services.quantization import ensure_embedding_index
+
+    config = alembic_config()
+    with engine.connect() as conn:
+        unversioned = current_schema_version(conn) is None and inspect(conn).has_table("users")
+    if unversioned:
+        # Created by create_all before migrations existed. 0001 is what the
+        # original create_all built; 0002 adds whatever later create_all
+        # runs did not, skipping what they did
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
+    ensure_embedding_index(engine, settings.embedding_quantization)
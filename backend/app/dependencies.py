@@ -1,14 +1,19 @@
 """
 Common dependencies for FastAPI routes
 """
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Cookie, Depends, HTTPException, Response, status, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+from typing import AsyncIterator, Optional
+import math
 import uuid
 import jwt
 
 from .config import settings
-from .database import get_db
+from .database import WRITE_LSN_COOKIE, WRITE_LSN_HEADER, get_db, primary_write_lsn, read_session
+from .services.admission import INGEST, SEARCH, AdmissionController, Rejected, get_admission_controller
 from . import models
 
 
@@ -51,6 +56,38 @@ def get_current_user_id(authorization: Optional[str] = Header(None)) -> uuid.UUI
         )
 
 
+def client_write_lsn(
+    write_lsn: Optional[str] = Cookie(None, alias=WRITE_LSN_COOKIE),
+    x_write_lsn: Optional[str] = Header(None),
+) -> Optional[str]:
+    """Marker of the client's last write, from the header or else the cookie"""
+    return x_write_lsn or write_lsn
+
+
+def remember_write(db: Session, response: Response) -> None:
+    """
+    After a committed write, hand the client the marker that keeps its
+    reads off a replica that has not replayed the write yet
+    """
+    lsn = primary_write_lsn(db)
+    if lsn is None:
+        return
+    response.set_cookie(
+        WRITE_LSN_COOKIE, lsn, max_age=max(1, math.ceil(settings.read_your_writes_seconds)),
+        httponly=True, samesite="lax",
+    )
+    response.headers[WRITE_LSN_HEADER] = lsn
+
+
+def get_read_db(write_lsn: Optional[str] = Depends(client_write_lsn)):
+    """
+    Session for read-only routes: the read replica when one is configured,
+    unless it has not caught up with the client's last write.
+    """
+    with read_session(write_lsn) as db:
+        yield db
+
+
 def get_current_user(
     user_id: uuid.UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db)
@@ -64,4 +101,91 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    return user
\ No newline at end of file
+    return user
+
+
+def too_many_requests(exc: Rejected) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=exc.reason,
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+class AdmissionSlot:
+    """
+    A request's place under its tenant's concurrency cap and the in-flight
+    cap. The admission dependency gives it back when it exits, unless a
+    streamed response has taken it over.
+    """
+
+    def __init__(self, user_id: uuid.UUID, request_class: str, controller: Optional[AdmissionController]):
+        self.user_id = user_id
+        self.request_class = request_class
+        self._controller = controller
+        self.handed_over = False
+
+    def hand_over(self) -> "AdmissionSlot":
+        self.handed_over = True
+        return self
+
+    def release(self) -> None:
+        """Give the slot back; only the first call counts"""
+        controller, self._controller = self._controller, None
+        if controller is not None:
+            controller.leave(self.user_id, self.request_class)
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that holds the request's admission slot until the
+    body has been sent (or the client has gone). Dependency exit code runs
+    before a streamed body is sent, so without this a streaming route
+    would give its slot back before doing any of its work.
+    """
+
+    def __init__(self, content, admission: AdmissionSlot, **kwargs):
+        super().__init__(content, **kwargs)
+        self.admission = admission.hand_over()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.admission.release()
+
+
+def _admission(request_class: str):
+    async def admit(user_id: uuid.UUID = Depends(get_current_user_id)) -> AsyncIterator[AdmissionSlot]:
+        """
+        Admit the request under the tenant's limits for `request_class` or
+        reject it with 429. Async so that a request over a limit is turned
+        away without waiting for a threadpool worker.
+        """
+        if not settings.admission_enabled:
+            yield AdmissionSlot(user_id, request_class, None)
+            return
+        controller = get_admission_controller()
+        try:
+            controller.enter(user_id, request_class)
+        except Rejected as exc:
+            raise too_many_requests(exc)
+        slot = AdmissionSlot(user_id, request_class, controller)
+        try:
+            try:
+                if controller.buckets.blocking:
+                    await run_in_threadpool(controller.take_tokens, user_id, request_class)
+                else:
+                    controller.take_tokens(user_id, request_class)
+            except Rejected as exc:
+                raise too_many_requests(exc)
+            yield slot
+        finally:
+            if not slot.handed_over:
+                slot.release()
+
+    return admit
+
+
+admit_ingest = _admission(INGEST)
+admit_search = _admission(SEARCH)
@@ -1,17 +1,33 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import init_db
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from .config import settings
+from .database import WRITE_LSN_HEADER, current_schema_version, engine, read_engine, schema_head
 from .routers import auth, documents, query
+from .services.deletion import reclaim_deleted_documents
+from .services.reembedding import run_reembedding
+from .services.scheduler import PeriodicJob
+from .services.status_refresh import run_status_refresh
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    init_db()
+    # Startup. The schema is migrated once per deploy by scripts/migrate_db.py,
+    # not here, so workers start without touching the database; /ready
+    # reports whether the database is reachable and migrated.
+    jobs = [
+        PeriodicJob("status-refresh", settings.status_refresh_interval_seconds, run_status_refresh),
+        PeriodicJob("deletion-sweep", settings.deletion_sweep_interval_seconds, reclaim_deleted_documents),
+        PeriodicJob("reembedding", settings.reembed_interval_seconds, run_reembedding),
+    ]
+    for job in jobs:
+        job.start()
     yield
-    # Shutdown (if needed)
-    pass
+    # Shutdown
+    for job in jobs:
+        job.stop()
 
 
 app = FastAPI(title="ContractHub API", lifespan=lifespan)
@@ -28,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=[WRITE_LSN_HEADER],
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -37,3 +54,29 @@ app.include_router(query.router, prefix="/query", tags=["query"])
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@app.get("/ready")
+def readiness_check():
+    """
+    Ready once a pooled connection works and the schema is at the latest
+    migration; with a read replica configured, it must answer too.
+    """
+    try:
+        with engine.connect() as conn:
+            version = current_schema_version(conn)
+        if read_engine is not engine:
+            with read_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "detail": f"Database unreachable: {e.__class__.__name__}"},
+        )
+    head = schema_head()
+    if version != head:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "detail": f"Schema at {version}, expected {head}; run scripts/migrate_db.py"},
+        )
+    return {"status": "ready", "schema_version": version}
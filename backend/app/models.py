@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from sqlalchemy import String, DateTime, ForeignKey, Text, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import String, DateTime, ForeignKey, Text, Integer, SmallInteger, BigInteger, Float, LargeBinary, Index, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from pgvector.sqlalchemy import Vector
@@ -9,6 +9,7 @@ import uuid
 from typing import Optional
 
 from .database import Base
+from .services.embeddings import EMBEDDING_DIM
 
 
 class User(Base):
@@ -17,6 +18,8 @@ class User(Base):
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     username: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Bumped whenever the document list changes; see services/versions.py
+    documents_version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0, server_default=text("0"))
 
     documents: Mapped[list["Document"]] = relationship("Document", back_populates="user", cascade="all, delete-orphan")
 
@@ -34,10 +37,36 @@ class Document(Base):
     # Additional fields for contract details
     parties: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     contract_type: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    # SHA-256 of the uploaded bytes, for per-tenant upload deduplication
+    content_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Media type of the upload; the bytes are in the blob store under content_sha256
+    content_type: Mapped[Optional[str]] = mapped_column(String(127), nullable=True)
+    # MinHash signature of the document's text (uint32 x NUM_PERM), see services/minhash.py
+    minhash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    # Set on delete; the row and its chunks are reclaimed in the background
+    deleted_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Bumped whenever the contract detail changes; see services/versions.py
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=1, server_default=text("1"))
     
     user: Mapped["User"] = relationship("User", back_populates="documents")
     chunks: Mapped[list["Chunk"]] = relationship("Chunk", back_populates="document", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Range scans for the dashboard's "expiring in N days" counts
+        Index("ix_documents_user_expiry", "user_id", "expiry_date"),
+        # Only contracts that can still change status, for the status refresh job
+        Index("ix_documents_expiry_open", "expiry_date", postgresql_where=text("status <> 'Expired'")),
+        # Soft-deleted documents awaiting reclaim, excluded from search
+        Index("ix_documents_deleted", "user_id", postgresql_where=text("deleted_at IS NOT NULL")),
+        # Blob garbage collection: is any document left with this content?
+        Index("ix_documents_content_sha256", "content_sha256"),
+        # One live document per tenant per content hash
+        Index(
+            "ux_documents_user_content", "user_id", "content_sha256",
+            unique=True, postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
+
 
 class Chunk(Base):
     __tablename__ = "chunks"
@@ -46,7 +75,82 @@ class Chunk(Base):
     doc_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("documents.doc_id", ondelete="CASCADE"), index=True)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), index=True)
     text_chunk: Mapped[str] = mapped_column(Text, nullable=False)
-    embedding: Mapped[list[float]] = mapped_column(Vector(4))
-    chunk_metadata: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    embedding: Mapped[list[float]] = mapped_column(Vector(EMBEDDING_DIM))
+    # Parser metadata fields queried on their own; see services/chunk_metadata.py
+    page: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    clause_type: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    # Any other parser metadata
+    chunk_metadata: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict, server_default=text("'{}'::jsonb"))
 
     document: Mapped["Document"] = relationship("Document", back_populates="chunks")
+
+    __table_args__ = (
+        # Contract detail: a document's clauses in page order, optionally of one type
+        Index("ix_chunks_doc_page", "doc_id", "page"),
+        Index("ix_chunks_doc_clause_page", "doc_id", "clause_type", "page"),
+        # Keyset pagination over a tenant's chunks for re-embedding
+        Index("ix_chunks_user_chunk", "user_id", "chunk_id"),
+    )
+
+
+class ChunkEmbedding(Base):
+    """
+    A chunk's embedding under a non-legacy model; the legacy model lives in
+    chunks.embedding. One partial HNSW index per model is created by
+    services/quantization.py.
+    """
+    __tablename__ = "chunk_embeddings"
+
+    chunk_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("chunks.chunk_id", ondelete="CASCADE"), primary_key=True)
+    model_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    doc_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    # Dimension varies by model, so the column is untyped
+    embedding: Mapped[list[float]] = mapped_column(Vector(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_chunk_embeddings_user_model", "user_id", "model_id"),
+    )
+
+
+class TenantEmbeddingState(Base):
+    """Which embedding model a tenant is searched with, and any re-embedding in progress"""
+    __tablename__ = "tenant_embedding_state"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    active_model: Mapped[str] = mapped_column(String(64), nullable=False, server_default=text("'hash-v1'"))
+    target_model: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Last chunk_id re-embedded for target_model
+    backfill_cursor: Mapped[Optional[uuid.UUID]] = mapped_column(UUID(as_uuid=True), nullable=True)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class DocumentStat(Base):
+    """Per-tenant document counters, maintained in the same transaction as document writes"""
+    __tablename__ = "document_stats"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    dimension: Mapped[str] = mapped_column(String(32), primary_key=True)  # total, status, risk_score, contract_type
+    bucket: Mapped[str] = mapped_column(String(100), primary_key=True)
+    doc_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class DocumentLSHBand(Base):
+    """LSH bucket of one MinHash band of a document; documents sharing a bucket are similar candidates"""
+    __tablename__ = "document_lsh_bands"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    band: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    doc_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("documents.doc_id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all API workers when ADMISSION_BACKEND=postgres"""
+    __tablename__ = "rate_limit_buckets"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    request_class: Mapped[str] = mapped_column(String(16), primary_key=True)  # ingest, search
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
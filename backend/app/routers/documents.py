@@ -1,22 +1,71 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, Header, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterator, List, Literal, Optional
+import hashlib
 import uuid
 
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, read_session
 from .. import models
-from ..schemas import DocumentOut, UploadResponse, ContractDetailOut, ContractClause, ContractInsight
+from ..schemas import BulkDeleteRequest, DeleteResponse, DocumentOut, DocumentStatsOut, SimilarDocumentOut, UploadResponse, ContractDetailOut, ContractClause, ContractInsight
+from ..services.blob_store import BlobRangeResponse, StagedBlob, collect_blob, content_disposition, get_blob_store, lock_blob, parse_range
+from ..services.chunk_metadata import split_metadata
+from ..services.deletion import mark_documents_deleted, reclaim_documents
 from ..services.llama_mock import mock_parse_and_chunk, generate_mock_contract_metadata
-from ..services.embeddings import embed_text_to_vector
-from ..dependencies import get_current_user_id
+from ..services.export import EXPORT_FORMATS, export_batches, parquet_available
+from ..services.embeddings import LEGACY_MODEL, embed_text_to_vector
+from ..services.reembedding import embedding_write_models, store_chunk_embeddings
+from ..services.similarity import find_similar_documents, index_document
+from ..services.stats import get_document_stats, record_document_change
+from ..services.vector_store import VectorItem, get_vector_store
+from ..services.versions import CACHE_CONTROL, bump_documents_version, document_version, documents_version, etag_matches, make_etag
+from ..dependencies import AdmissionSlot, AdmittedStreamingResponse, admit_ingest, admit_search, client_write_lsn, get_current_user_id, get_read_db, remember_write
 
 router = APIRouter()
 
+UPLOAD_READ_BLOCK = 1024 * 1024
 
-@router.post("/upload", response_model=UploadResponse)
+
+def _find_live_document_by_hash(db: Session, user_id: uuid.UUID, content_sha256: str) -> Optional[uuid.UUID]:
+    return db.query(models.Document.doc_id).filter(
+        models.Document.user_id == user_id,
+        models.Document.content_sha256 == content_sha256,
+        models.Document.deleted_at.is_(None)
+    ).scalar()
+
+
+async def _duplicate_upload(db: Session, staged: StagedBlob, doc_id: uuid.UUID, content_type: Optional[str]) -> UploadResponse:
+    """
+    Answer an upload of bytes the tenant already has. The existing document
+    may predate stored originals, so its blob is published from this upload
+    when it is missing, along with the content type it is served as.
+    """
+    if not await run_in_threadpool(staged.store.exists, staged.sha256):
+        lock_blob(db, staged.sha256)
+        await run_in_threadpool(staged.publish)
+        db.query(models.Document).filter(
+            models.Document.doc_id == doc_id,
+            models.Document.content_type.is_(None)
+        ).update({models.Document.content_type: content_type}, synchronize_session=False)
+        db.commit()
+    return UploadResponse(doc_id=doc_id, chunks_inserted=0, duplicate=True)
+
+
+def _collect_uncommitted_blob(db: Session, sha256: str) -> None:
+    """Remove a blob published by an upload that did not commit, unless another document refers to it"""
+    db.rollback()
+    collect_blob(db, sha256)
+    db.commit()
+
+
+@router.post("/upload", response_model=UploadResponse, dependencies=[Depends(admit_ingest)])
 async def upload_document(
+    response: Response,
     file: UploadFile = File(...),
     user_id: uuid.UUID = Depends(get_current_user_id),
     db: Session = Depends(get_db),
@@ -24,52 +73,126 @@ async def upload_document(
     if file.content_type not in ("application/pdf", "text/plain", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported file type")
 
-    content_bytes = await file.read()
+    # Hash and stage the original bytes while draining the upload, so
+    # duplicates are caught before any parsing
+    staged = await run_in_threadpool(get_blob_store().stage)
     try:
-        text = content_bytes.decode("utf-8", errors="ignore")
-    except Exception:
-        text = ""
+        parts: list[bytes] = []
+        while block := await file.read(UPLOAD_READ_BLOCK):
+            await run_in_threadpool(staged.write, block)
+            parts.append(block)
+        content_sha256 = staged.sha256
 
-    # Generate mock contract metadata
-    mock_metadata = generate_mock_contract_metadata(file.filename or "contract.pdf")
-    
-    document = models.Document(
-        user_id=user_id, 
-        filename=file.filename or "contract.pdf",
-        parties=mock_metadata["parties"],
-        contract_type=mock_metadata["contract_type"],
-        expiry_date=mock_metadata["expiry_date"],
-        status=mock_metadata["status"],
-        risk_score=mock_metadata["risk_score"]
-    )
-    db.add(document)
-    db.commit()
-    db.refresh(document)
-
-    parsed = mock_parse_and_chunk(file.filename or "contract.pdf", text)
-    chunks_to_add: list[models.Chunk] = []
-    for ch in parsed["chunks"]:
-        vec = ch.get("embedding") or embed_text_to_vector(ch.get("text", ""))
-        chunk = models.Chunk(
-            doc_id=document.doc_id,
-            user_id=user_id,
-            text_chunk=ch["text"],
-            embedding=vec,
-            chunk_metadata=ch.get("metadata", {}),
+        existing = _find_live_document_by_hash(db, user_id, content_sha256)
+        if existing is not None:
+            return await _duplicate_upload(db, staged, existing, file.content_type)
+
+        content_bytes = b"".join(parts)
+        try:
+            text = content_bytes.decode("utf-8", errors="ignore")
+        except Exception:
+            text = ""
+
+        # Generate mock contract metadata
+        mock_metadata = generate_mock_contract_metadata(file.filename or "contract.pdf")
+        
+        document = models.Document(
+            user_id=user_id, 
+            filename=file.filename or "contract.pdf",
+            parties=mock_metadata["parties"],
+            contract_type=mock_metadata["contract_type"],
+            expiry_date=mock_metadata["expiry_date"],
+            status=mock_metadata["status"],
+            risk_score=mock_metadata["risk_score"],
+            content_sha256=content_sha256,
+            content_type=file.content_type,
         )
-        chunks_to_add.append(chunk)
-    db.add_all(chunks_to_add)
-    db.commit()
+        db.add(document)
+        record_document_change(db, user_id, after=document)
+        bump_documents_version(db, [user_id])
+        # Under the blob's lock until commit, so garbage collection cannot
+        # remove the file before the row referring to it is visible
+        lock_blob(db, content_sha256)
+        await run_in_threadpool(staged.publish)
+        try:
+            # The document, its chunks and their embeddings commit together, so
+            # a failed ingest leaves nothing for a retry to be deduplicated to.
+            # Flushing the row first claims the content hash.
+            try:
+                db.flush()
+            except IntegrityError:
+                # A concurrent upload of the same bytes won the unique index
+                db.rollback()
+                existing = _find_live_document_by_hash(db, user_id, content_sha256)
+                if existing is None:
+                    raise
+                return await _duplicate_upload(db, staged, existing, file.content_type)
+
+            parsed = mock_parse_and_chunk(file.filename or "contract.pdf", text)
+            chunks_to_add: list[models.Chunk] = []
+            for ch in parsed["chunks"]:
+                vec = ch.get("embedding") or embed_text_to_vector(ch.get("text", ""))
+                chunk = models.Chunk(
+                    chunk_id=uuid.uuid4(),
+                    doc_id=document.doc_id,
+                    user_id=user_id,
+                    text_chunk=ch["text"],
+                    embedding=vec,
+                    **split_metadata(ch.get("metadata", {})),
+                )
+                chunks_to_add.append(chunk)
+            # Captured before commit, which expires the ORM attributes
+            doc_id = document.doc_id
+            vector_items = {LEGACY_MODEL.model_id: [VectorItem(c.chunk_id, c.doc_id, c.embedding) for c in chunks_to_add]}
+            db.add_all(chunks_to_add)
+            # chunk_embeddings rows reference the chunks, and the session does not autoflush
+            db.flush()
+            index_document(db, document, [c.text_chunk for c in chunks_to_add])
+            # chunks.embedding holds the legacy model; the tenant's active model and
+            # any model it is being re-embedded with go to chunk_embeddings
+            write_models = embedding_write_models(db, user_id)
+            rows = [(c.chunk_id, c.doc_id, c.text_chunk) for c in chunks_to_add]
+            for model in write_models:
+                if not model.legacy:
+                    vector_items[model.model_id] = store_chunk_embeddings(db, user_id, model, rows)
+            db.commit()
+        except Exception:
+            # Whatever kept the document from committing, its blob must not outlive it
+            _collect_uncommitted_blob(db, content_sha256)
+            raise
+    finally:
+        await run_in_threadpool(staged.discard)
+    remember_write(db, response)
+
+    active = write_models[0].model_id
+    get_vector_store(active).add(db, user_id, vector_items[active])
 
-    return UploadResponse(doc_id=document.doc_id, chunks_inserted=len(chunks_to_add))
+    return UploadResponse(doc_id=doc_id, chunks_inserted=len(chunks_to_add))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @router.get("/list", response_model=List[DocumentOut])
 def list_documents(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     user_id: uuid.UUID = Depends(get_current_user_id), 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    docs = db.query(models.Document).filter(models.Document.user_id == user_id).order_by(models.Document.uploaded_on.desc()).all()
+    # Read before the list, so a concurrent change can only make the stamp
+    # older than the body, never newer
+    etag = make_etag("list", user_id.hex, documents_version(db, user_id))
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    docs = db.query(models.Document).filter(
+        models.Document.user_id == user_id,
+        models.Document.deleted_at.is_(None)
+    ).order_by(models.Document.uploaded_on.desc()).all()
     
     # Convert datetime objects to strings for serialization
     result = []
@@ -89,39 +212,196 @@ def list_documents(
     return result
 
 
+@router.get("/stats", response_model=DocumentStatsOut)
+def document_stats(
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    return DocumentStatsOut(**get_document_stats(db, user_id))
+
+
+@router.get("/export")
+def export_documents(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv"),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    write_lsn: Optional[str] = Depends(client_write_lsn),
+    admission: AdmissionSlot = Depends(admit_ingest),
+):
+    """
+    Every live document with all its clauses, one row per clause, streamed
+    from a server-side cursor as it is read. Admitted as ingest: an export
+    holds a connection and a cursor for as long as an upload does.
+    """
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Parquet export requires pyarrow")
+    write, media_type, extension = EXPORT_FORMATS[format]
+
+    def body() -> Iterator[bytes]:
+        with read_session(write_lsn) as db:
+            yield from write(export_batches(db, user_id))
+
+    # The admission slot is held until the last row has been sent
+    return AdmittedStreamingResponse(
+        body(),
+        admission,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="contracts-export.{extension}"'},
+    )
+
+
+@router.post("/bulk-delete", response_model=DeleteResponse)
+def bulk_delete_documents(
+    payload: BulkDeleteRequest,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    deleted = mark_documents_deleted(db, user_id, payload.doc_ids)
+    if deleted:
+        remember_write(db, response)
+    background_tasks.add_task(reclaim_documents, deleted)
+    return DeleteResponse(deleted=deleted)
+
+
+@router.delete("/{doc_id}", response_model=DeleteResponse)
+def delete_document(
+    doc_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    deleted = mark_documents_deleted(db, user_id, [doc_id])
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
+    remember_write(db, response)
+    background_tasks.add_task(reclaim_documents, deleted)
+    return DeleteResponse(deleted=deleted)
+
+
+@router.get("/{doc_id}/file")
+def download_document_file(
+    doc_id: uuid.UUID,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    doc = db.query(models.Document.filename, models.Document.content_sha256, models.Document.content_type).filter(
+        models.Document.doc_id == doc_id,
+        models.Document.user_id == user_id,
+        models.Document.deleted_at.is_(None)
+    ).first()
+    if not doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
+    store = get_blob_store()
+    if not doc.content_sha256 or not store.exists(doc.content_sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Original file not stored")
+
+    # Blobs never change, so the content hash is the ETag
+    etag = f'"{doc.content_sha256}"'
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    media_type = doc.content_type or "application/octet-stream"
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+
+    if settings.blob_accel_redirect_prefix:
+        # The front proxy sends the file (and handles Range) itself
+        headers["Content-Disposition"] = content_disposition(doc.filename)
+        headers["X-Accel-Redirect"] = settings.blob_accel_redirect_prefix.rstrip("/") + "/" + store.relative_path(doc.content_sha256)
+        return Response(media_type=media_type, headers=headers)
+
+    path = store.path_for(doc.content_sha256)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        # Collected since the check above
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Original file not stored")
+    # If-Range: only honour Range if the client's copy is still current
+    if if_range is not None and if_range.strip() != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, filename=doc.filename, headers=headers)
+    start, end = byte_range
+    headers["Content-Disposition"] = content_disposition(doc.filename)
+    return BlobRangeResponse(path, start, end, size, media_type, headers)
+
+
+@router.get("/{doc_id}/similar", response_model=List[SimilarDocumentOut], dependencies=[Depends(admit_search)])
+def similar_documents(
+    doc_id: uuid.UUID,
+    limit: int = Query(10, ge=1, le=100),
+    threshold: float = Query(0.7, ge=0.0, le=1.0),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    similar = find_similar_documents(db, user_id, doc_id, limit, threshold)
+    if similar is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
+    return [SimilarDocumentOut(**s) for s in similar]
+
+
 @router.get("/{doc_id}", response_model=ContractDetailOut)
 def get_contract_detail(
     doc_id: uuid.UUID, 
+    response: Response,
+    clause_type: Optional[str] = Query(None, description="Only clauses of this type"),
+    if_none_match: Optional[str] = Header(None),
     user_id: uuid.UUID = Depends(get_current_user_id), 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    version = document_version(db, user_id, doc_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
+    clause_filter = hashlib.sha256(clause_type.encode()).hexdigest()[:16] if clause_type is not None else "all"
+    etag = make_etag("doc", doc_id.hex, version, clause_filter)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
     # Get document with user verification
     doc = db.query(models.Document).filter(
         models.Document.doc_id == doc_id,
-        models.Document.user_id == user_id
+        models.Document.user_id == user_id,
+        models.Document.deleted_at.is_(None)
     ).first()
     
     if not doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contract not found")
     
-    # Get chunks for this document to generate clauses
-    chunks = db.query(models.Chunk).filter(
+    # First clauses in page order, read from the typed columns and the
+    # (doc_id, [clause_type,] page) indexes
+    q = db.query(
+        models.Chunk.text_chunk, models.Chunk.clause_type, models.Chunk.page, models.Chunk.confidence
+    ).filter(
         models.Chunk.doc_id == doc_id,
         models.Chunk.user_id == user_id
-    ).all()
+    )
+    if clause_type is not None:
+        q = q.filter(models.Chunk.clause_type == clause_type)
+    chunks = q.order_by(models.Chunk.page.asc().nulls_last()).limit(6).all()  # Limit to first 6 for demo
     
     # Generate clauses from chunks
     clauses = []
-    for chunk in chunks[:6]:  # Limit to first 6 for demo
-        clause_type = chunk.chunk_metadata.get("clause_type", "general")
-        page = chunk.chunk_metadata.get("page", 1)
-        confidence = chunk.chunk_metadata.get("confidence", 0.85)
+    for chunk in chunks:
+        chunk_clause_type = chunk.clause_type or "general"
         
         clauses.append(ContractClause(
-            title=f"{clause_type.replace('_', ' ').title()} Clause",
+            title=f"{chunk_clause_type.replace('_', ' ').title()} Clause",
             text=chunk.text_chunk,
-            confidence=confidence,
-            page=page
+            confidence=chunk.confidence if chunk.confidence is not None else 0.85,
+            page=chunk.page if chunk.page is not None else 1
         ))
     
     # Generate mock insights based on risk score and status
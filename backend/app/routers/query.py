@@ -1,60 +1,176 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List
+from typing import Iterable, Iterator, List, Optional
+import orjson
+import re
 import uuid
 
-from ..database import get_db
-from ..schemas import QueryRequest, QueryResponse, ChunkOut
-from ..services.embeddings import embed_text_to_vector
-from ..dependencies import get_current_user_id
+from ..config import settings
+from ..database import read_session
+from ..schemas import BatchQueryRequest, BatchQueryResponse, DocumentHitsOut, QueryRequest, QueryResponse, ChunkOut
+from ..services.admission import SEARCH, Rejected, get_admission_controller
+from ..services.quantization import HNSW_MAX_EF_SEARCH
+from ..services.reembedding import active_embedding_model
+from ..services.vector_store import STREAM_BATCH_ROWS, SearchHit, VectorStore, get_vector_store, load_hit_payloads
+from ..dependencies import AdmissionSlot, AdmittedStreamingResponse, admit_search, client_write_lsn, get_current_user_id, get_read_db, too_many_requests
 
 router = APIRouter()
 
 
-@router.post("/search", response_model=QueryResponse)
+@router.post("/search", response_model=QueryResponse, dependencies=[Depends(admit_search)])
 def search(
     req: QueryRequest, 
     user_id: uuid.UUID = Depends(get_current_user_id), 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    qvec = embed_text_to_vector(req.query)
-    # Convert list to PostgreSQL vector format string
-    qvec_str = f"[{','.join(map(str, qvec))}]"
-    # Use SQL for pgvector cosine distance with fully formatted string
-    sql = text(
-        f"""
-        SELECT chunk_id, text_chunk, chunk_metadata, 1 - (embedding <=> '{qvec_str}'::vector) AS relevance
-        FROM chunks
-        WHERE user_id = '{str(user_id)}'
-        ORDER BY embedding <=> '{qvec_str}'::vector
-        LIMIT {req.top_k}
-        """
-    )
-    rows = db.execute(sql).mappings().all()
+    # The tenant's active model; it changes only when a re-embedding completes
+    model = active_embedding_model(db, user_id)
+    qvec = model.embed(req.query)
+    store = get_vector_store(model.model_id)
+    if req.group_by_document:
+        return _search_grouped(req, qvec, store, user_id, db)
+    hits = store.search(db, user_id, qvec, req.top_k)
+    hits = load_hit_payloads(db, hits)
     chunks: List[ChunkOut] = []
-    for r in rows:
+    for h in hits:
         chunks.append(
             ChunkOut(
-                chunk_id=r["chunk_id"],
-                text_chunk=r["text_chunk"],
-                relevance=float(r["relevance"]),
-                metadata=r["chunk_metadata"],
+                chunk_id=h.chunk_id,
+                text_chunk=h.text_chunk,
+                relevance=h.relevance,
+                metadata=h.metadata,
             )
         )
     
+    return QueryResponse(answer=_mock_answer(req.query, len(chunks)), chunks=chunks)
+
+
+def _search_grouped(
+    req: QueryRequest, qvec: List[float], store: VectorStore, user_id: uuid.UUID, db: Session
+) -> QueryResponse:
+    # An HNSW scan returns at most HNSW_MAX_EF_SEARCH rows, so a larger pool
+    # would be cut short without notice; at the cap the pool still holds
+    # max_documents * chunks_per_document (at most 50 * 20) chunks
+    candidates = min(
+        max(
+            settings.grouped_search_candidates,
+            req.max_documents * req.chunks_per_document * settings.rerank_candidates_factor,
+        ),
+        HNSW_MAX_EF_SEARCH,
+    )
+    groups = store.search_grouped(
+        db, user_id, qvec, req.max_documents, req.chunks_per_document, candidates
+    )
+    documents = [
+        DocumentHitsOut(
+            doc_id=g.doc_id,
+            filename=g.filename,
+            contract_type=g.contract_type,
+            relevance=g.relevance,
+            chunks=[
+                ChunkOut(chunk_id=h.chunk_id, text_chunk=h.text_chunk, relevance=h.relevance, metadata=h.metadata)
+                for h in g.hits
+            ],
+        )
+        for g in groups
+    ]
+    num_chunks = sum(len(d.chunks) for d in documents)
+    return QueryResponse(answer=_mock_answer(req.query, num_chunks), chunks=[], documents=documents)
+
+
+@router.post("/search/batch", response_model=BatchQueryResponse, dependencies=[Depends(admit_search)])
+def search_batch(
+    req: BatchQueryRequest,
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    # admit_search charged one query; a batch pays for the rest
+    if settings.admission_enabled and len(req.queries) > 1:
+        try:
+            get_admission_controller().take_tokens(user_id, SEARCH, len(req.queries) - 1)
+        except Rejected as exc:
+            raise too_many_requests(exc)
+    # One embedding pass and one vector-store round trip for every query
+    model = active_embedding_model(db, user_id)
+    qvecs = model.embed_batch(req.queries)
+    results = get_vector_store(model.model_id).search_many(db, user_id, qvecs, req.top_k)
+    load_hit_payloads(db, [h for hits in results for h in hits])
+    responses = []
+    for query, hits in zip(req.queries, results):
+        chunks = [
+            ChunkOut(chunk_id=h.chunk_id, text_chunk=h.text_chunk, relevance=h.relevance, metadata=h.metadata)
+            for h in hits
+            if h.text_chunk is not None  # chunk deleted since it was indexed
+        ]
+        responses.append(QueryResponse(answer=_mock_answer(query, len(chunks)), chunks=chunks))
+    return BatchQueryResponse(results=responses)
+
+
+@router.post("/search/stream")
+def search_stream(
+    req: QueryRequest,
+    accept: Optional[str] = Header(None),
+    user_id: uuid.UUID = Depends(get_current_user_id),
+    write_lsn: Optional[str] = Depends(client_write_lsn),
+    admission: AdmissionSlot = Depends(admit_search),
+):
+    """
+    Streaming variant of /search: one event per chunk as rows arrive from the
+    cursor, then the answer in pieces, then a final "done" event. Sent as
+    Server-Sent Events if the client accepts text/event-stream, NDJSON
+    otherwise.
+    """
+    sse = accept is not None and "text/event-stream" in accept
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+
+    def frame(event: dict) -> bytes:
+        payload = orjson.dumps(event)
+        return b"data: " + payload + b"\n\n" if sse else payload + b"\n"
+
+    def events() -> Iterator[bytes]:
+        with read_session(write_lsn) as db:
+            model = active_embedding_model(db, user_id)
+            qvec = model.embed(req.query)
+            hits = get_vector_store(model.model_id).stream_search(db, user_id, qvec, req.top_k)
+            sent = 0
+            for batch in _batched(hits, STREAM_BATCH_ROWS):
+                for h in load_hit_payloads(db, batch):
+                    chunk = ChunkOut(chunk_id=h.chunk_id, text_chunk=h.text_chunk, relevance=h.relevance, metadata=h.metadata)
+                    yield frame({"type": "chunk", "chunk": chunk.model_dump(mode="json")})
+                    sent += 1
+            for piece in re.findall(r"\S+\s*", _mock_answer(req.query, sent)):
+                yield frame({"type": "answer_delta", "text": piece})
+            yield frame({"type": "done", "chunks": sent})
+
+    # The admission slot is held until the last event has been sent
+    return AdmittedStreamingResponse(
+        events(), admission, media_type=media_type, headers={"Cache-Control": "no-cache"}
+    )
+
+
+def _batched(items: Iterable[SearchHit], size: int) -> Iterator[List[SearchHit]]:
+    batch: List[SearchHit] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _mock_answer(query: str, num_chunks: int) -> str:
     # Generate more contextual mock answer based on query
-    if "termination" in req.query.lower():
+    if "termination" in query.lower():
         answer = "Based on the contract analysis, termination clauses typically require 90 days written notice. The retrieved clauses show specific termination conditions and notice requirements."
-    elif "liability" in req.query.lower():
+    elif "liability" in query.lower():
         answer = "Liability provisions in your contracts generally limit exposure to 12 months of fees. Review the specific liability caps and exclusions in each contract."
-    elif "payment" in req.query.lower():
+    elif "payment" in query.lower():
         answer = "Payment terms across your contracts typically require payment within 30 days of invoice receipt, with potential late payment charges of 1.5% monthly."
-    elif "confidentiality" in req.query.lower():
+    elif "confidentiality" in query.lower():
         answer = "Confidentiality clauses protect proprietary information during the contract term and typically extend beyond contract termination."
     else:
-        answer = f"Based on your query about '{req.query}', I found {len(chunks)} relevant contract clauses. The retrieved sections provide specific details about your contract terms and conditions."
-    
-    return QueryResponse(answer=answer, chunks=chunks)
+        answer = f"Based on your query about '{query}', I found {num_chunks} relevant contract clauses. The retrieved sections provide specific details about your contract terms and conditions."
+    return answer
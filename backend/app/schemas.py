@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 
 class TokenResponse(BaseModel):
@@ -29,13 +29,38 @@ class DocumentOut(BaseModel):
     class Config:
         from_attributes = True
 
+class DocumentStatsOut(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_risk_score: Dict[str, int]
+    by_contract_type: Dict[str, int]
+    expiring: Dict[str, int]  # "30" / "60" / "90" days -> count
+
+class SimilarDocumentOut(BaseModel):
+    doc_id: uuid.UUID
+    filename: str
+    contract_type: Optional[str] = None
+    similarity: float  # estimated Jaccard similarity of the document texts
+
 class UploadResponse(BaseModel):
     doc_id: uuid.UUID
     chunks_inserted: int
+    duplicate: bool = False  # identical bytes already uploaded; doc_id is the existing document
+
+class BulkDeleteRequest(BaseModel):
+    doc_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=1000)
+
+class DeleteResponse(BaseModel):
+    deleted: List[uuid.UUID]
 
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 5
+    # Collapse results by document: best `chunks_per_document` chunks for
+    # each of the best `max_documents` documents (top_k is then ignored)
+    group_by_document: bool = False
+    chunks_per_document: int = Field(2, ge=1, le=20)
+    max_documents: int = Field(5, ge=1, le=50)
 
 class ChunkOut(BaseModel):
     chunk_id: uuid.UUID
@@ -43,9 +68,24 @@ class ChunkOut(BaseModel):
     relevance: float
     metadata: dict
 
+class DocumentHitsOut(BaseModel):
+    doc_id: uuid.UUID
+    filename: str
+    contract_type: Optional[str] = None
+    relevance: float
+    chunks: List[ChunkOut]
+
 class QueryResponse(BaseModel):
     answer: str
     chunks: List[ChunkOut]
+    documents: List[DocumentHitsOut] = []
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=100)
+    top_k: int = 5
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]  # one per query, in request order
 
 class ContractClause(BaseModel):
     title: str
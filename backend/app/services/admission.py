@@ -0,0 +1,197 @@
+"""
+Per-tenant admission control for ingestion and search.
+
+Each tenant has a token bucket (sustained rate plus burst) and a cap on
+concurrent requests for each request class, and all classes share a cap on
+requests in flight in this process. A request over any limit is rejected
+with 429 and Retry-After instead of queueing for the threadpool and the DB
+pool, so one tenant's bulk script cannot push up everyone else's latency.
+
+Concurrency and in-flight counts are per process, like the pools they
+protect. Token buckets are in memory by default; with
+ADMISSION_BACKEND=postgres they live in `rate_limit_buckets` and every
+worker draws from the same bucket.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+
+INGEST = "ingest"
+SEARCH = "search"
+REQUEST_CLASSES = (INGEST, SEARCH)
+
+# Drop idle in-memory buckets once this many tenants have one
+_MAX_MEMORY_BUCKETS = 10_000
+
+
+@dataclass(frozen=True)
+class Limits:
+    rate: float  # tokens per second
+    burst: int
+    max_concurrent: int
+
+
+def limits_for(request_class: str) -> Limits:
+    if request_class == INGEST:
+        return Limits(settings.ingest_rate_per_second, settings.ingest_burst, settings.ingest_max_concurrent)
+    if request_class == SEARCH:
+        return Limits(settings.search_rate_per_second, settings.search_burst, settings.search_max_concurrent)
+    raise ValueError(f"Unknown request class {request_class!r}; expected one of {REQUEST_CLASSES}")
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class MemoryTokenBuckets:
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[uuid.UUID, str], Tuple[float, float]] = {}  # tokens, monotonic time
+
+    def take(self, user_id: uuid.UUID, request_class: str, limits: Limits, cost: int = 1) -> float:
+        """Take `cost` tokens; returns 0 if taken, else seconds until they are available"""
+        now = time.monotonic()
+        key = (user_id, request_class)
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(limits.burst), now))
+            tokens = min(float(limits.burst), tokens + (now - updated) * limits.rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > _MAX_MEMORY_BUCKETS:
+                self._prune(now)
+            return (cost - tokens) / limits.rate
+
+    def _prune(self, now: float) -> None:
+        # A bucket that has refilled completely is the same as no bucket
+        for key, (tokens, updated) in list(self._buckets.items()):
+            limits = limits_for(key[1])
+            if tokens + (now - updated) * limits.rate >= limits.burst:
+                del self._buckets[key]
+
+
+class PostgresTokenBuckets:
+    """Buckets in `rate_limit_buckets`, refilled and debited in one locked UPDATE"""
+
+    blocking = True
+
+    _TAKE = text(
+        """
+        UPDATE rate_limit_buckets AS b
+        SET tokens = CASE WHEN s.refilled >= :cost THEN s.refilled - :cost ELSE s.refilled END,
+            updated_at = s.now
+        FROM (
+            SELECT user_id, request_class, clock_timestamp() AS now,
+                   LEAST(CAST(:burst AS float8),
+                         tokens + :rate * EXTRACT(EPOCH FROM clock_timestamp() - updated_at)) AS refilled
+            FROM rate_limit_buckets
+            WHERE user_id = :user_id AND request_class = :request_class
+            FOR UPDATE
+        ) AS s
+        WHERE b.user_id = s.user_id AND b.request_class = s.request_class
+        RETURNING s.refilled
+        """
+    )
+    _CREATE = text(
+        """
+        INSERT INTO rate_limit_buckets (user_id, request_class, tokens, updated_at)
+        VALUES (:user_id, :request_class, :burst - :cost, clock_timestamp())
+        ON CONFLICT (user_id, request_class) DO NOTHING
+        RETURNING tokens
+        """
+    )
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+
+    def take(self, user_id: uuid.UUID, request_class: str, limits: Limits, cost: int = 1) -> float:
+        params = {
+            "user_id": user_id,
+            "request_class": request_class,
+            "rate": limits.rate,
+            "burst": limits.burst,
+            "cost": cost,
+        }
+        with self._engine.begin() as conn:
+            refilled = conn.execute(self._TAKE, params).scalar()
+            if refilled is None:
+                # First request from this tenant; a concurrent insert wins the
+                # race and this one goes through the UPDATE instead
+                if conn.execute(self._CREATE, params).scalar() is not None:
+                    return 0.0
+                refilled = conn.execute(self._TAKE, params).scalar()
+        if refilled >= cost:
+            return 0.0
+        return (cost - refilled) / limits.rate
+
+
+class AdmissionController:
+    def __init__(self, buckets, max_inflight: int):
+        self.buckets = buckets
+        self.max_inflight = max_inflight
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._active: Dict[Tuple[uuid.UUID, str], int] = {}
+
+    def enter(self, user_id: uuid.UUID, request_class: str) -> None:
+        """Claim a concurrency slot, or raise Rejected; pair with `leave`"""
+        limits = limits_for(request_class)
+        key = (user_id, request_class)
+        with self._lock:
+            if self._inflight >= self.max_inflight:
+                raise Rejected("Server is busy, retry shortly", 1.0)
+            active = self._active.get(key, 0)
+            if active >= limits.max_concurrent:
+                raise Rejected(f"Too many concurrent {request_class} requests", 1.0)
+            self._active[key] = active + 1
+            self._inflight += 1
+
+    def leave(self, user_id: uuid.UUID, request_class: str) -> None:
+        key = (user_id, request_class)
+        with self._lock:
+            self._inflight -= 1
+            active = self._active[key] - 1
+            if active:
+                self._active[key] = active
+            else:
+                del self._active[key]
+
+    def take_tokens(self, user_id: uuid.UUID, request_class: str, cost: int = 1) -> None:
+        """Debit the tenant's bucket, or raise Rejected with the wait until it can be"""
+        limits = limits_for(request_class)
+        # A cost above the burst could never be paid in one go
+        wait = self.buckets.take(user_id, request_class, limits, min(cost, limits.burst))
+        if wait > 0:
+            raise Rejected(f"{request_class.capitalize()} rate limit exceeded", wait)
+
+    def inflight(self) -> int:
+        return self._inflight
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    backend = settings.admission_backend
+    if backend == "memory":
+        buckets = MemoryTokenBuckets()
+    elif backend == "postgres":
+        from ..database import engine
+        buckets = PostgresTokenBuckets(engine)
+    else:
+        raise ValueError(f"Unknown ADMISSION_BACKEND {backend!r}; expected 'memory' or 'postgres'")
+    return AdmissionController(buckets, settings.admission_max_inflight)
@@ -0,0 +1,202 @@
+"""
+Content-addressed store for the original bytes of uploaded files.
+
+A blob lives at `<root>/<sha[0:2]>/<sha[2:4]>/<sha256>`, so identical
+uploads, across tenants too, share one file, and a blob never changes once
+written. Uploads are streamed into a staging file under `<root>/tmp` while
+being hashed, then hard-linked into place. Publishing and garbage
+collection take the same per-hash transaction-level advisory lock, and a
+blob is only removed when no document row refers to it, so a document row
+can never commit pointing at a removed blob.
+
+`BlobRangeResponse` serves a byte range of a blob for HTTP Range requests;
+whole files go out through Starlette's `FileResponse`, or through the
+front proxy when `BLOB_ACCEL_REDIRECT_PREFIX` is set.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Mapping, Optional, Tuple, Union
+from urllib.parse import quote
+
+import anyio
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from ..config import settings
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class StagedBlob:
+    """An upload being written to the staging area; hashed as it is written"""
+
+    def __init__(self, store: "BlobStore"):
+        self.store = store
+        self.path = store.root / "tmp" / f"{uuid.uuid4().hex}.part"
+        self._file = open(self.path, "wb")
+        self._hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._hasher.update(data)
+        self.size += len(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._hasher.hexdigest()
+
+    def publish(self) -> Path:
+        """Move the bytes to their content address; a blob already there is kept as is"""
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        final = self.store.path_for(self.sha256)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(self.path, final)
+        except FileExistsError:
+            pass
+        return final
+
+    def discard(self) -> None:
+        """Remove the staging file; safe to call after `publish`"""
+        if not self._file.closed:
+            self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        (self.root / "tmp").mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, sha256: str) -> Path:
+        if not _SHA256.match(sha256):
+            raise ValueError(f"Not a SHA-256 hex digest: {sha256!r}")
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def relative_path(self, sha256: str) -> str:
+        return self.path_for(sha256).relative_to(self.root).as_posix()
+
+    def stage(self) -> StagedBlob:
+        return StagedBlob(self)
+
+    def exists(self, sha256: str) -> bool:
+        return self.path_for(sha256).is_file()
+
+    def delete(self, sha256: str) -> None:
+        self.path_for(sha256).unlink(missing_ok=True)
+
+
+def lock_blob(db: Union[Session, Connection], sha256: str) -> None:
+    """Serialise publishing and collecting one blob until the transaction ends"""
+    db.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:sha256, 0))"), {"sha256": sha256})
+
+
+def collect_blob(conn: Connection, sha256: Optional[str]) -> bool:
+    """Remove the blob if no document refers to it any more; does not commit. Returns whether it was removed"""
+    if not sha256:
+        return False
+    lock_blob(conn, sha256)
+    referenced = conn.execute(
+        text("SELECT 1 FROM documents WHERE content_sha256 = :sha256 LIMIT 1"),
+        {"sha256": sha256},
+    ).first()
+    if referenced is not None:
+        return False
+    get_blob_store().delete(sha256)
+    return True
+
+
+def content_disposition(filename: str) -> str:
+    """`attachment` header value for `filename`, as Starlette's FileResponse builds it"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single `bytes=` range, clamped to the file.
+    None means serve the whole file (no header, or a form not supported
+    here, like multiple ranges); raises ValueError if unsatisfiable.
+    """
+    if not header:
+        return None
+    m = _RANGE.match(header.strip())
+    if m is None:
+        return None
+    first, last = m.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:  # invalid, so the header is ignored
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+class BlobRangeResponse(Response):
+    """206 response with bytes `start`..`end` (inclusive) of a file, read in chunks"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        start: int,
+        end: int,
+        size: int,
+        media_type: str,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = 206
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:  # file shorter than expected
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    return BlobStore(settings.blob_store_path)
@@ -0,0 +1,48 @@
+"""
+Chunk metadata layout.
+
+The parser's per-chunk metadata is stored split: the fields that are
+filtered, ordered or read on their own (`page`, `clause_type`,
+`confidence`) are typed columns on `chunks`, and whatever else it emits
+stays in the `chunk_metadata` JSONB column. API responses still expose one
+metadata dict per chunk.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Mapping, Optional
+
+TYPED_FIELDS = ("page", "clause_type", "confidence")
+
+# Column list for raw SQL that needs everything `row_metadata` reads
+METADATA_COLUMNS = "chunk_metadata, page, clause_type, confidence"
+
+
+def split_metadata(metadata: Mapping[str, Any]) -> Dict[str, Any]:
+    """Chunk column values for a parser metadata dict"""
+    page = metadata.get("page")
+    confidence = metadata.get("confidence")
+    return {
+        "page": int(page) if page is not None else None,
+        "clause_type": metadata.get("clause_type"),
+        "confidence": float(confidence) if confidence is not None else None,
+        "chunk_metadata": {k: v for k, v in metadata.items() if k not in TYPED_FIELDS},
+    }
+
+
+def merge_metadata(
+    extra: Optional[Mapping[str, Any]],
+    page: Optional[int],
+    clause_type: Optional[str],
+    confidence: Optional[float],
+) -> Dict[str, Any]:
+    """The single metadata dict the API returns for a chunk"""
+    metadata = dict(extra or {})
+    for key, value in (("page", page), ("clause_type", clause_type), ("confidence", confidence)):
+        if value is not None:
+            metadata[key] = value
+    return metadata
+
+
+def row_metadata(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """`merge_metadata` for a result row selecting METADATA_COLUMNS"""
+    return merge_metadata(row["chunk_metadata"], row["page"], row["clause_type"], row["confidence"])
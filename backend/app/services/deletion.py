@@ -0,0 +1,132 @@
+"""
+Two-phase document deletion.
+
+Deleting marks `documents.deleted_at` and adjusts the dashboard counters in
+one short transaction, which hides the document from list, detail and search
+immediately. Its chunks are then reclaimed in small batches, one transaction
+per batch, and the document row goes last, with its original file if no
+other document shares it; this avoids a single long `ON DELETE CASCADE`
+over thousands of chunk rows and index entries. A periodic sweep finishes
+any reclaim interrupted by a restart. A per-document advisory lock keeps
+the sweep and the request's own background reclaim from running on the
+same document at once.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from collections import Counter
+from typing import List, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import engine
+from .blob_store import collect_blob
+from .embeddings import EMBEDDING_MODELS
+from .stats import apply_stat_deltas, document_stat_keys
+from .vector_store import get_vector_store
+from .versions import bump_documents_version
+
+# Seeds the per-document advisory lock key, keeping it apart from other
+# hashtextextended-based locks
+_RECLAIM_LOCK_SEED = 0x5265636C61696D
+
+
+def mark_documents_deleted(db: Session, user_id: uuid.UUID, doc_ids: Sequence[uuid.UUID]) -> List[uuid.UUID]:
+    """Soft-delete the tenant's live documents among `doc_ids`; returns the ones deleted"""
+    if not doc_ids:
+        return []
+    rows = db.execute(
+        text(
+            """
+            UPDATE documents SET deleted_at = now()
+            WHERE user_id = :user_id AND doc_id = ANY(:doc_ids) AND deleted_at IS NULL
+            RETURNING doc_id, status, risk_score, contract_type
+            """
+        ),
+        {"user_id": user_id, "doc_ids": list(doc_ids)},
+    ).all()
+    deltas: Counter = Counter()
+    for _doc_id, status, risk_score, contract_type in rows:
+        for key in document_stat_keys(user_id, status, risk_score, contract_type):
+            deltas[key] -= 1
+    apply_stat_deltas(db, deltas)
+    if rows:
+        bump_documents_version(db, [user_id])
+    db.commit()
+
+    deleted = [r[0] for r in rows]
+    for model_id in EMBEDDING_MODELS:
+        get_vector_store(model_id).delete(db, user_id, deleted)
+    return deleted
+
+
+def reclaim_document(doc_id: uuid.UUID) -> int:
+    """
+    Delete a soft-deleted document's chunks in batches, then the document
+    row. Skips the document if another worker is already reclaiming it.
+    """
+    batch_size = settings.deletion_batch_size
+    removed = 0
+    with engine.connect() as conn:
+        # Session-level, so it is held across the per-batch commits. Without
+        # it a second reclaimer (the sweep, or a repeated request) makes
+        # batches come up short, and the document row would then be
+        # deleted while chunks remain, cascading in one long transaction.
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_lock(hashtextextended(CAST(:doc_id AS text), :seed))"),
+            {"doc_id": doc_id, "seed": _RECLAIM_LOCK_SEED},
+        ).scalar()
+        conn.commit()
+        if not locked:
+            return 0
+        try:
+            while True:
+                n = conn.execute(
+                    text(
+                        """
+                        DELETE FROM chunks WHERE chunk_id IN (
+                            SELECT chunk_id FROM chunks WHERE doc_id = :doc_id LIMIT :batch_size
+                        )
+                        """
+                    ),
+                    {"doc_id": doc_id, "batch_size": batch_size},
+                ).rowcount
+                conn.commit()
+                if n == 0:
+                    break
+                removed += n
+                if n == batch_size:
+                    time.sleep(settings.deletion_batch_pause_ms / 1000)
+            content_sha256 = conn.execute(
+                text("DELETE FROM documents WHERE doc_id = :doc_id AND deleted_at IS NOT NULL RETURNING content_sha256"),
+                {"doc_id": doc_id},
+            ).scalar()
+            # The original file goes once no other document (any tenant) shares it
+            collect_blob(conn, content_sha256)
+            conn.commit()
+        finally:
+            conn.rollback()  # no-op unless a batch failed
+            conn.execute(
+                text("SELECT pg_advisory_unlock(hashtextextended(CAST(:doc_id AS text), :seed))"),
+                {"doc_id": doc_id, "seed": _RECLAIM_LOCK_SEED},
+            )
+            conn.commit()
+    return removed
+
+
+def reclaim_documents(doc_ids: Sequence[uuid.UUID]) -> None:
+    for doc_id in doc_ids:
+        reclaim_document(doc_id)
+
+
+def reclaim_deleted_documents() -> int:
+    """Sweep: finish reclaiming every soft-deleted document; returns how many"""
+    with engine.connect() as conn:
+        doc_ids = conn.execute(
+            text("SELECT doc_id FROM documents WHERE deleted_at IS NOT NULL ORDER BY deleted_at")
+        ).scalars().all()
+    reclaim_documents(doc_ids)
+    return len(doc_ids)
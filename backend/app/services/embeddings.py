@@ -1,8 +1,22 @@
+"""
+Embedding models.
+
+Every model is registered under a model id. "hash-v1", the original 4-dim
+hash embedding, is the legacy model stored in `chunks.embedding`; other
+models are stored per model id in `chunk_embeddings`, so a new model can be
+backfilled next to the one a tenant searches today (services/reembedding.py).
+"""
 from __future__ import annotations
 
-from typing import List
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
 
 # 4-dim embedding to match schema
+EMBEDDING_DIM = 4
+
 
 def embed_text_to_vector(text: str) -> List[float]:
     # Simple deterministic hash-based embedding for demo
@@ -11,3 +25,82 @@ def embed_text_to_vector(text: str) -> List[float]:
         h[i % 4] = (h[i % 4] + ch) % 100
     # normalize to [-1,1]
     return [(x / 50.0) - 1.0 for x in h]
+
+
+def embed_texts_to_vectors(texts: Sequence[str]) -> List[List[float]]:
+    """Vectorised `embed_text_to_vector` over a batch of texts in one pass"""
+    if not texts:
+        return []
+    encoded = [t.encode("utf-8") for t in texts]
+    # Zero-pad each text to a whole number (at least one) of 4-byte rows;
+    # padding adds nothing to the per-position byte sums
+    padded = [b + b"\0" * (-len(b) % 4 if b else 4) for b in encoded]
+    rows = np.frombuffer(b"".join(padded), dtype=np.uint8).reshape(-1, 4).astype(np.int64)
+    starts = np.cumsum([0] + [len(b) // 4 for b in padded[:-1]])
+    sums = np.add.reduceat(rows, starts, axis=0) % 100
+    return ((sums / 50.0) - 1.0).tolist()
+
+
+def vector_literal(vec: Sequence[float]) -> str:
+    """Format a vector as a pgvector text literal, e.g. '[0.1,0.2,0.3,0.4]'"""
+    return f"[{','.join(map(str, vec))}]"
+
+
+def vector_array_literal(vecs: Sequence[Sequence[float]]) -> str:
+    """Format vectors as a Postgres vector[] text literal"""
+    return "{" + ",".join(f'"{vector_literal(v)}"' for v in vecs) + "}"
+
+
+TRIGRAM_DIM = 64
+
+
+def embed_texts_trigrams(texts: Sequence[str]) -> List[List[float]]:
+    """
+    Signed feature hashing of lower-cased byte trigrams into TRIGRAM_DIM
+    buckets, L2-normalised; texts sharing wording land close together.
+    """
+    out = np.zeros((len(texts), TRIGRAM_DIM), dtype=np.float64)
+    for row, t in enumerate(texts):
+        b = np.frombuffer(t.lower().encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        if len(b) < 3:
+            continue
+        codes = (b[:-2] << np.uint64(16)) | (b[1:-1] << np.uint64(8)) | b[2:]
+        h = (codes * np.uint64(0x9E3779B1)) & np.uint64(0xFFFFFFFF)
+        buckets = ((h >> np.uint64(16)) % np.uint64(TRIGRAM_DIM)).astype(np.int64)
+        signs = np.where((h >> np.uint64(15)) & np.uint64(1), -1.0, 1.0)
+        out[row] = np.bincount(buckets, weights=signs, minlength=TRIGRAM_DIM)
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    return (out / np.maximum(norms, 1e-12)).tolist()
+
+
+@dataclass(frozen=True)
+class EmbeddingModel:
+    model_id: str
+    dim: int
+    embed_batch: Callable[[Sequence[str]], List[List[float]]]
+    legacy: bool = False  # stored in chunks.embedding rather than chunk_embeddings
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0]
+
+
+LEGACY_MODEL = EmbeddingModel("hash-v1", EMBEDDING_DIM, embed_texts_to_vectors, legacy=True)
+
+# Model ids are inlined into SQL (partial index predicates), so keep them plain
+_MODEL_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+EMBEDDING_MODELS: Dict[str, EmbeddingModel] = {
+    m.model_id: m
+    for m in (
+        LEGACY_MODEL,
+        EmbeddingModel("trigram-v2", TRIGRAM_DIM, embed_texts_trigrams),
+    )
+    if _MODEL_ID.match(m.model_id)
+}
+
+
+def get_embedding_model(model_id: str) -> EmbeddingModel:
+    try:
+        return EMBEDDING_MODELS[model_id]
+    except KeyError:
+        raise ValueError(f"Unknown embedding model {model_id!r}, expected one of {tuple(EMBEDDING_MODELS)}") from None
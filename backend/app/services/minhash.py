@@ -0,0 +1,111 @@
+"""
+MinHash signatures and LSH banding for near-duplicate contract detection.
+
+A document's signature is the element-wise minimum of `NUM_PERM` universal
+hashes over its word shingles; the fraction of equal positions between two
+signatures estimates their Jaccard similarity. The signature is split into
+`NUM_BANDS` bands of `ROWS_PER_BAND` values and each band is hashed to a
+bucket; documents sharing any bucket become candidates, which finds pairs
+above roughly (1 / NUM_BANDS) ** (1 / ROWS_PER_BAND) similarity without
+comparing every pair. Candidates are then verified on their signatures.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+import numpy as np
+
+NUM_PERM = 120
+NUM_BANDS = 24
+ROWS_PER_BAND = NUM_PERM // NUM_BANDS
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(1)
+# Coefficients kept below 2**32 so a * hash (hash < 2**32) fits in uint64
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(texts: Iterable[str], size: int = SHINGLE_SIZE) -> Set[str]:
+    shingle_set: Set[str] = set()
+    for t in texts:
+        words = _WORD.findall(t.lower())
+        if len(words) < size:
+            if words:
+                shingle_set.add(" ".join(words))
+            continue
+        for i in range(len(words) - size + 1):
+            shingle_set.add(" ".join(words[i:i + size]))
+    return shingle_set
+
+
+def signature(texts: Iterable[str]) -> np.ndarray:
+    """MinHash signature (uint32[NUM_PERM]) of the word shingles in `texts`"""
+    sh = shingles(texts)
+    if not sh:
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    hv = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in sh),
+        dtype=np.uint64,
+        count=len(sh),
+    )
+    perms = ((np.outer(hv, _A) + _B) % _MERSENNE_PRIME) & _MAX_HASH
+    return perms.min(axis=0).astype(np.uint32)
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<u4")
+
+
+def band_hashes(sig: np.ndarray) -> List[int]:
+    """One signed 64-bit bucket hash per band (fits a Postgres BIGINT)"""
+    bands = sig.astype("<u4").reshape(NUM_BANDS, ROWS_PER_BAND)
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "little", signed=True)
+        for band in bands
+    ]
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class LSHIndex:
+    """In-process banding index, for offline use and benchmarks"""
+
+    def __init__(self):
+        self._buckets: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(NUM_BANDS)]
+        self._keys: List[Hashable] = []
+        self._signatures = np.empty((1024, NUM_PERM), dtype=np.uint32)
+
+    def add(self, key: Hashable, sig: np.ndarray) -> None:
+        pos = len(self._keys)
+        if pos == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[pos] = sig
+        self._keys.append(key)
+        for band, h in enumerate(band_hashes(sig)):
+            self._buckets[band][h].append(pos)
+
+    def query(self, sig: np.ndarray, threshold: float = 0.5) -> List[Tuple[Hashable, float]]:
+        """Keys whose estimated Jaccard with `sig` is at least `threshold`, best first"""
+        candidates: Set[int] = set()
+        for band, h in enumerate(band_hashes(sig)):
+            candidates.update(self._buckets[band].get(h, ()))
+        if not candidates:
+            return []
+        positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        sims = (self._signatures[positions] == sig).sum(axis=1) / NUM_PERM
+        order = np.argsort(-sims)
+        return [(self._keys[positions[i]], float(sims[i])) for i in order if sims[i] >= threshold]
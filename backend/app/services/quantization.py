@@ -0,0 +1,170 @@
+"""
+Compact ANN index representations for chunk embeddings.
+
+`chunks.embedding` always holds the full-precision vector. In the compact
+modes the HNSW index is built over a quantized *expression* of that column
+(pgvector `halfvec` or `binary_quantize(...)::bit`), so only the index
+shrinks. Search walks the compact index for a candidate set and re-ranks
+the candidates by exact cosine distance on the full vectors.
+
+Embeddings of non-legacy models live in `chunk_embeddings` and get one
+partial index per model, built the same way over a cast of the column.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .embeddings import EMBEDDING_DIM, EMBEDDING_MODELS, EmbeddingModel
+
+QUANTIZATION_MODES = ("none", "halfvec", "binary")
+
+# mode -> (index name suffix, indexed expression template, operator class).
+# Templates take the vector column expression and its dimension.
+_INDEX_SPECS = {
+    "none": ("hnsw", "{column}", "vector_cosine_ops"),
+    "halfvec": ("halfvec_hnsw", "({column}::halfvec({dim}))", "halfvec_cosine_ops"),
+    "binary": ("binary_hnsw", "(binary_quantize({column})::bit({dim}))", "bit_hamming_ops"),
+}
+
+
+def validate_mode(mode: str) -> str:
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown embedding quantization mode {mode!r}, expected one of {QUANTIZATION_MODES}")
+    return mode
+
+
+def index_name(mode: str) -> str:
+    return f"ix_chunks_embedding_{_INDEX_SPECS[validate_mode(mode)][0]}"
+
+
+def index_ddl(mode: str) -> str:
+    _, expr, opclass = _INDEX_SPECS[validate_mode(mode)]
+    expr = expr.format(column="embedding", dim=EMBEDDING_DIM)
+    return f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(mode)} ON chunks USING hnsw ({expr} {opclass})"
+
+
+def model_column(model: EmbeddingModel) -> str:
+    """
+    `chunk_embeddings.embedding` is an untyped vector column shared by all
+    models; indexes and searches go through a cast to the model's dimension.
+    """
+    return f"(embedding::vector({model.dim}))"
+
+
+def model_index_name(mode: str, model: EmbeddingModel) -> str:
+    slug = model.model_id.replace("-", "_")
+    return f"ix_chunk_embeddings_{slug}_{_INDEX_SPECS[validate_mode(mode)][0]}"
+
+
+def model_index_ddl(mode: str, model: EmbeddingModel) -> str:
+    """Partial HNSW index over one model's rows of `chunk_embeddings`"""
+    _, expr, opclass = _INDEX_SPECS[validate_mode(mode)]
+    expr = expr.format(column=model_column(model), dim=model.dim)
+    return (
+        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {model_index_name(mode, model)} ON chunk_embeddings "
+        f"USING hnsw ({expr} {opclass}) WHERE model_id = '{model.model_id}'"
+    )
+
+
+def coarse_distance_sql(
+    mode: str,
+    query: str = "CAST(:qvec AS vector)",
+    column: str = "embedding",
+    dim: int = EMBEDDING_DIM,
+) -> str:
+    """
+    Distance expression that matches the index for `mode`, so the planner
+    can use it for ORDER BY ... LIMIT. `query` is a SQL expression of type
+    vector (a bind parameter cast, or a column of a LATERAL query list).
+    """
+    validate_mode(mode)
+    if mode == "halfvec":
+        return f"{column}::halfvec({dim}) <=> ({query})::halfvec({dim})"
+    if mode == "binary":
+        return f"binary_quantize({column})::bit({dim}) <~> binary_quantize({query})::bit({dim})"
+    return f"{column} <=> {query}"
+
+
+# pgvector's bounds for hnsw.ef_search; its default is the lower one
+HNSW_MIN_EF_SEARCH = 40
+HNSW_MAX_EF_SEARCH = 1000
+
+
+def candidate_count(mode: str, top_k: int, factor: int) -> int:
+    """
+    Number of coarse candidates to re-rank; the full-precision path needs
+    none. Capped at what one HNSW scan can return, but never below top_k.
+    """
+    if validate_mode(mode) == "none":
+        return top_k
+    return max(min(top_k * max(factor, 1), HNSW_MAX_EF_SEARCH), top_k)
+
+_iterative_scan_support: Dict[str, bool] = {}
+
+
+def _supports_iterative_scan(db: Union[Session, Connection]) -> bool:
+    """pgvector 0.8+ can keep walking the HNSW graph when filters drop rows"""
+    bind = db.get_bind() if isinstance(db, Session) else db
+    key = str(bind.engine.url)
+    if key not in _iterative_scan_support:
+        version = db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+        parts = tuple(int(p) for p in (version or "0.0").split(".")[:2])
+        _iterative_scan_support[key] = parts >= (0, 8)
+    return _iterative_scan_support[key]
+
+
+def set_hnsw_search_params(db: Union[Session, Connection], candidates: int) -> None:
+    """
+    Let HNSW scans in the current transaction return `candidates` rows. A
+    scan stops after hnsw.ef_search rows (40 by default) and the tenant and
+    soft-delete filters are applied to those, so in a shared table a tenant
+    could get fewer than top-k hits, or none. Iterative scans, where
+    available, keep going until enough rows pass the filters; relaxed
+    order is enough since candidates are re-ranked by exact distance.
+    """
+    ef_search = min(max(candidates, HNSW_MIN_EF_SEARCH), HNSW_MAX_EF_SEARCH)
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+    if _supports_iterative_scan(db):
+        db.execute(text("SET LOCAL hnsw.iterative_scan = relaxed_order"))
+
+
+def _index_valid(conn: Connection, name: str) -> Optional[bool]:
+    """Whether the index is usable; None if it does not exist"""
+    return conn.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    ).scalar()
+
+
+def _create_index(conn: Connection, name: str, ddl: str) -> None:
+    # A failed concurrent build leaves an INVALID index behind, which
+    # IF NOT EXISTS would keep; drop it and build again
+    if _index_valid(conn, name) is False:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(ddl))
+
+
+def ensure_embedding_index(bind: Engine, mode: str) -> None:
+    """
+    Create the HNSW index for the configured mode if it does not exist yet,
+    on `chunks` and for every registered model stored in `chunk_embeddings`,
+    then drop the indexes of the other modes, so switching to a compact
+    mode shrinks the index instead of adding one next to the old.
+
+    Runs against a serving database, so indexes are built and dropped
+    CONCURRENTLY (outside a transaction) and writes carry on meanwhile.
+    """
+    models = [m for m in EMBEDDING_MODELS.values() if not m.legacy]
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        _create_index(conn, index_name(mode), index_ddl(mode))
+        for model in models:
+            _create_index(conn, model_index_name(mode, model), model_index_ddl(mode, model))
+        for other in QUANTIZATION_MODES:
+            if other == mode:
+                continue
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name(other)}"))
+            for model in models:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {model_index_name(other, model)}"))
@@ -0,0 +1,302 @@
+"""
+Online re-embedding of a tenant's chunks under a new embedding model.
+
+`tenant_embedding_state` records the model each tenant is searched with
+(`active_model`, the legacy model when there is no row) and the model being
+backfilled (`target_model`). While a backfill runs, uploads write
+embeddings for both models, and a background job re-embeds existing chunks
+in keyset-paginated batches of `reembed_batch_size`, one transaction each
+with the cursor saved alongside the embeddings, so it resumes where it
+stopped after a restart. Searches keep using the active model throughout.
+
+Once the cursor is exhausted, the job locks the tenant's state row (uploads
+hold a share lock on it while they write), embeds anything the cursor
+missed, and switches `active_model` in the same transaction, so a tenant's
+searches move to the new model all at once. Rows of models no longer in
+use are then deleted in batches.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import engine
+from .embeddings import EMBEDDING_MODELS, LEGACY_MODEL, EmbeddingModel, get_embedding_model, vector_array_literal
+from .vector_store import VectorItem, get_vector_store
+
+_ADVISORY_LOCK_KEY = 0x5265656D626564  # arbitrary, unique to this job
+_NIL_UUID = uuid.UUID(int=0)
+CUTOVER_LOCK_TIMEOUT_MS = 2000
+
+ChunkRow = Tuple[uuid.UUID, uuid.UUID, str]  # chunk_id, doc_id, text_chunk
+
+
+def _registered(model_id: Optional[str]) -> EmbeddingModel:
+    # A model removed from the registry falls back to chunks.embedding,
+    # which is always written
+    return EMBEDDING_MODELS.get(model_id or "", LEGACY_MODEL)
+
+
+def active_embedding_model(db: Session, user_id: uuid.UUID) -> EmbeddingModel:
+    """The model the tenant's searches use"""
+    model_id = db.execute(
+        text("SELECT active_model FROM tenant_embedding_state WHERE user_id = :user_id"),
+        {"user_id": user_id},
+    ).scalar()
+    return _registered(model_id)
+
+
+def embedding_write_models(db: Session, user_id: uuid.UUID) -> List[EmbeddingModel]:
+    """
+    Models new chunks must be embedded with: the active one first, then the
+    backfill target if any. Takes a share lock on the tenant's state row
+    until the caller commits, so a cutover cannot miss the chunks written.
+    """
+    db.execute(
+        text("INSERT INTO tenant_embedding_state (user_id) VALUES (:user_id) ON CONFLICT DO NOTHING"),
+        {"user_id": user_id},
+    )
+    active, target = db.execute(
+        text("SELECT active_model, target_model FROM tenant_embedding_state WHERE user_id = :user_id FOR SHARE"),
+        {"user_id": user_id},
+    ).one()
+    models = [_registered(active)]
+    if target is not None and _registered(target) is not models[0]:
+        models.append(_registered(target))
+    return models
+
+
+def store_chunk_embeddings(
+    db: Union[Session, Connection],
+    user_id: uuid.UUID,
+    model: EmbeddingModel,
+    rows: Sequence[ChunkRow],
+) -> List[VectorItem]:
+    """Embed chunk texts with a non-legacy model and upsert them in one statement; does not commit"""
+    if not rows:
+        return []
+    vectors = model.embed_batch([r[2] for r in rows])
+    db.execute(
+        text(
+            """
+            INSERT INTO chunk_embeddings (chunk_id, model_id, user_id, doc_id, embedding)
+            SELECT t.chunk_id, :model_id, :user_id, t.doc_id, t.embedding
+            FROM unnest(CAST(:chunk_ids AS uuid[]), CAST(:doc_ids AS uuid[]), CAST(:embeddings AS vector[]))
+                AS t(chunk_id, doc_id, embedding)
+            ON CONFLICT (chunk_id, model_id) DO UPDATE SET embedding = excluded.embedding
+            """
+        ),
+        {
+            "model_id": model.model_id,
+            "user_id": user_id,
+            "chunk_ids": [r[0] for r in rows],
+            "doc_ids": [r[1] for r in rows],
+            "embeddings": vector_array_literal(vectors),
+        },
+    )
+    return [VectorItem(r[0], r[1], v) for r, v in zip(rows, vectors)]
+
+
+def start_reembedding(conn: Connection, model: EmbeddingModel) -> int:
+    """
+    Point every tenant not yet on `model` at it as the backfill target, and
+    cancel backfills of tenants already on it; does not commit. Returns the
+    number of tenants whose target changed.
+    """
+    conn.execute(
+        text(
+            """
+            INSERT INTO tenant_embedding_state (user_id)
+            SELECT u.user_id FROM users u
+            WHERE NOT EXISTS (SELECT 1 FROM tenant_embedding_state s WHERE s.user_id = u.user_id)
+            ON CONFLICT DO NOTHING
+            """
+        )
+    )
+    return conn.execute(
+        text(
+            """
+            UPDATE tenant_embedding_state
+            SET target_model = NULLIF(:model_id, active_model), backfill_cursor = NULL, updated_at = now()
+            WHERE target_model IS DISTINCT FROM NULLIF(:model_id, active_model)
+            """
+        ),
+        {"model_id": model.model_id},
+    ).rowcount
+
+
+def reembed_batch(conn: Connection, user_id: uuid.UUID, batch_size: int) -> Optional[int]:
+    """
+    Re-embed the tenant's next batch of chunks after the cursor, or cut over
+    once there are none left. Returns the number of chunks embedded, or None
+    when there is nothing more to do for the tenant in this run (not
+    re-embedding, or the cutover lock timed out).
+    """
+    state = conn.execute(
+        text("SELECT target_model, backfill_cursor FROM tenant_embedding_state WHERE user_id = :user_id"),
+        {"user_id": user_id},
+    ).one_or_none()
+    if state is None or state.target_model is None:
+        conn.rollback()
+        return None
+    model = _registered(state.target_model)
+
+    rows: List[ChunkRow] = []
+    if not model.legacy:
+        rows = [
+            tuple(r)
+            for r in conn.execute(
+                text(
+                    """
+                    SELECT chunk_id, doc_id, text_chunk FROM chunks
+                    WHERE user_id = :user_id AND chunk_id > :cursor
+                    ORDER BY chunk_id
+                    LIMIT :batch_size
+                    """
+                ),
+                {"user_id": user_id, "cursor": state.backfill_cursor or _NIL_UUID, "batch_size": batch_size},
+            )
+        ]
+    if not rows:
+        return _cut_over(conn, user_id, model)
+
+    store_chunk_embeddings(conn, user_id, model, rows)
+    # Guarded on the target so a concurrent restart of the backfill wins
+    conn.execute(
+        text(
+            """
+            UPDATE tenant_embedding_state SET backfill_cursor = :cursor, updated_at = now()
+            WHERE user_id = :user_id AND target_model = :model_id
+            """
+        ),
+        {"user_id": user_id, "cursor": rows[-1][0], "model_id": model.model_id},
+    )
+    conn.commit()
+    return len(rows)
+
+
+def _cut_over(conn: Connection, user_id: uuid.UUID, model: EmbeddingModel) -> Optional[int]:
+    conn.execute(text(f"SET LOCAL lock_timeout = '{CUTOVER_LOCK_TIMEOUT_MS}ms'"))
+    try:
+        target = conn.execute(
+            text("SELECT target_model FROM tenant_embedding_state WHERE user_id = :user_id FOR UPDATE"),
+            {"user_id": user_id},
+        ).scalar()
+    except OperationalError:
+        conn.rollback()
+        return None
+    if target != model.model_id:
+        conn.rollback()
+        return None
+
+    # Chunks the cursor had passed when they were written by uploads that
+    # did not know about the target yet; none can appear while the lock is held
+    filled = 0
+    if not model.legacy:
+        missing = [
+            tuple(r)
+            for r in conn.execute(
+                text(
+                    """
+                    SELECT c.chunk_id, c.doc_id, c.text_chunk FROM chunks c
+                    WHERE c.user_id = :user_id AND NOT EXISTS (
+                        SELECT 1 FROM chunk_embeddings e WHERE e.chunk_id = c.chunk_id AND e.model_id = :model_id
+                    )
+                    """
+                ),
+                {"user_id": user_id, "model_id": model.model_id},
+            )
+        ]
+        store_chunk_embeddings(conn, user_id, model, missing)
+        filled = len(missing)
+    conn.execute(
+        text(
+            """
+            UPDATE tenant_embedding_state
+            SET active_model = target_model, target_model = NULL, backfill_cursor = NULL, updated_at = now()
+            WHERE user_id = :user_id
+            """
+        ),
+        {"user_id": user_id},
+    )
+    conn.commit()
+
+    get_vector_store(model.model_id).invalidate(user_id)
+    _prune_embeddings(conn, user_id, model)
+    return filled
+
+
+def _prune_embeddings(conn: Connection, user_id: uuid.UUID, keep: EmbeddingModel) -> None:
+    """Delete, in batches, the tenant's embeddings of models other than `keep`"""
+    batch_size = settings.reembed_batch_size
+    while True:
+        n = conn.execute(
+            text(
+                """
+                DELETE FROM chunk_embeddings WHERE (chunk_id, model_id) IN (
+                    SELECT chunk_id, model_id FROM chunk_embeddings
+                    WHERE user_id = :user_id AND model_id <> :model_id
+                    LIMIT :batch_size
+                )
+                """
+            ),
+            {"user_id": user_id, "model_id": keep.model_id, "batch_size": batch_size},
+        ).rowcount
+        conn.commit()
+        if n < batch_size:
+            break
+        time.sleep(settings.reembed_batch_pause_ms / 1000)
+
+
+def reembed_all(
+    conn: Connection,
+    model: EmbeddingModel,
+    max_batches: Optional[int] = None,
+    on_batch: Optional[Callable[[uuid.UUID, int], None]] = None,
+) -> int:
+    """
+    Move every tenant towards `model`, pausing `reembed_batch_pause_ms`
+    between batches, for at most `max_batches` batches (None: until done).
+    Returns the number of chunks embedded, or 0 without doing anything if
+    another worker holds the job lock.
+    """
+    if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}).scalar():
+        conn.rollback()
+        return 0
+    conn.commit()
+    embedded = 0
+    batches = 0
+    try:
+        start_reembedding(conn, model)
+        conn.commit()
+        tenants = conn.execute(
+            text("SELECT user_id FROM tenant_embedding_state WHERE target_model IS NOT NULL ORDER BY updated_at")
+        ).scalars().all()
+        conn.commit()
+        for user_id in tenants:
+            while max_batches is None or batches < max_batches:
+                batches += 1
+                n = reembed_batch(conn, user_id, settings.reembed_batch_size)
+                if n is None:
+                    break
+                embedded += n
+                if on_batch is not None:
+                    on_batch(user_id, n)
+                time.sleep(settings.reembed_batch_pause_ms / 1000)
+    finally:
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        conn.commit()
+    return embedded
+
+
+def run_reembedding() -> int:
+    model = get_embedding_model(settings.embedding_model)
+    with engine.connect() as conn:
+        return reembed_all(conn, model, settings.reembed_max_batches_per_run)
@@ -0,0 +1,39 @@
+"""
+In-process periodic background jobs started from the app lifespan.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Callable, Optional
+
+
+class PeriodicJob:
+    """Daemon thread calling `fn` every `interval_seconds`; `fn` returns a count of work done"""
+
+    def __init__(self, name: str, interval_seconds: int, fn: Callable[[], int]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                done = self.fn()
+                if done:
+                    print(f"{self.name}: processed {done}")
+            except Exception as e:
+                print(f"Warning: {self.name} failed: {e}")
@@ -0,0 +1,73 @@
+"""
+"Similar contracts" lookup over the per-tenant LSH band table.
+
+Candidates are the documents that share at least one band bucket with the
+query document (primary-key lookups on `document_lsh_bands`); they are then
+ranked by estimated Jaccard similarity of their MinHash signatures.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .. import models
+from . import minhash
+
+
+def index_document(db: Session, document: models.Document, texts: Iterable[str]) -> None:
+    """Store the document's signature and LSH band rows; does not commit"""
+    sig = minhash.signature(texts)
+    document.minhash = minhash.to_bytes(sig)
+    db.add_all(
+        models.DocumentLSHBand(user_id=document.user_id, band=band, bucket=bucket, doc_id=document.doc_id)
+        for band, bucket in enumerate(minhash.band_hashes(sig))
+    )
+
+
+def find_similar_documents(
+    db: Session, user_id: uuid.UUID, doc_id: uuid.UUID, limit: int, threshold: float
+) -> Optional[List[dict]]:
+    """Similar live documents, best first; None if the query document does not exist"""
+    query_doc = db.execute(
+        text("SELECT minhash FROM documents WHERE doc_id = :doc_id AND user_id = :user_id AND deleted_at IS NULL"),
+        {"doc_id": doc_id, "user_id": user_id},
+    ).first()
+    if query_doc is None:
+        return None
+    if query_doc.minhash is None:  # uploaded before signatures existed
+        return []
+    query_sig = minhash.from_bytes(query_doc.minhash)
+
+    rows = db.execute(
+        text(
+            """
+            SELECT d.doc_id, d.filename, d.contract_type, d.minhash
+            FROM documents d
+            WHERE d.doc_id IN (
+                SELECT b.doc_id
+                FROM document_lsh_bands q
+                JOIN document_lsh_bands b
+                  ON b.user_id = q.user_id AND b.band = q.band AND b.bucket = q.bucket
+                WHERE q.doc_id = :doc_id AND q.user_id = :user_id AND b.doc_id <> :doc_id
+            )
+            AND d.deleted_at IS NULL
+            """
+        ),
+        {"doc_id": doc_id, "user_id": user_id},
+    ).mappings().all()
+
+    scored = []
+    for r in rows:
+        similarity = minhash.estimated_jaccard(query_sig, minhash.from_bytes(r["minhash"]))
+        if similarity >= threshold:
+            scored.append({
+                "doc_id": r["doc_id"],
+                "filename": r["filename"],
+                "contract_type": r["contract_type"],
+                "similarity": round(similarity, 3),
+            })
+    scored.sort(key=lambda s: -s["similarity"])
+    return scored[:limit]
@@ -0,0 +1,127 @@
+"""
+Incrementally maintained per-tenant dashboard counters.
+
+Every document write adjusts `document_stats` in its own transaction, so the
+dashboard reads a handful of rows from one primary-key range instead of
+listing every document. "Expiring in N days" depends on the clock rather
+than on writes, so it is counted with a range scan on
+`ix_documents_user_expiry` bounded to the widest window.
+"""
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from typing import Dict, Optional, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .. import models
+
+STAT_DIMENSIONS = ("status", "risk_score", "contract_type")
+UNSPECIFIED = "Unspecified"
+EXPIRY_WINDOWS_DAYS = (30, 60, 90)
+
+StatKey = Tuple[uuid.UUID, str, str]
+
+
+def document_stat_keys(user_id: uuid.UUID, status: str, risk_score: str, contract_type: Optional[str]) -> list[StatKey]:
+    """Counter rows a single document contributes to"""
+    return [
+        (user_id, "total", "all"),
+        (user_id, "status", status),
+        (user_id, "risk_score", risk_score),
+        (user_id, "contract_type", contract_type or UNSPECIFIED),
+    ]
+
+
+def apply_stat_deltas(db: Union[Session, Connection], deltas: Dict[StatKey, int]) -> None:
+    """Add `deltas` to the counters without committing; zero deltas are skipped"""
+    # Sorted so concurrent writers for one tenant lock counter rows in the same order
+    rows = [
+        {"user_id": user_id, "dimension": dimension, "bucket": bucket, "doc_count": delta}
+        for (user_id, dimension, bucket), delta in sorted(deltas.items(), key=lambda kv: (str(kv[0][0]), kv[0][1], kv[0][2]))
+        if delta
+    ]
+    if not rows:
+        return
+    stmt = insert(models.DocumentStat).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "dimension", "bucket"],
+        set_={"doc_count": models.DocumentStat.doc_count + stmt.excluded.doc_count},
+    )
+    db.execute(stmt)
+
+
+def record_document_change(
+    db: Session,
+    user_id: uuid.UUID,
+    before: Optional[models.Document] = None,
+    after: Optional[models.Document] = None,
+) -> None:
+    """Adjust counters for a document insert (before=None), delete (after=None) or update"""
+    deltas: Counter = Counter()
+    if before is not None:
+        for key in document_stat_keys(user_id, before.status, before.risk_score, before.contract_type):
+            deltas[key] -= 1
+    if after is not None:
+        for key in document_stat_keys(user_id, after.status, after.risk_score, after.contract_type):
+            deltas[key] += 1
+    apply_stat_deltas(db, deltas)
+
+
+def rebuild_document_stats(db: Session, user_id: uuid.UUID) -> None:
+    """Recompute a tenant's counters from `documents` (backfill / repair); does not commit"""
+    db.execute(text("DELETE FROM document_stats WHERE user_id = :user_id"), {"user_id": user_id})
+    db.execute(
+        text(
+            """
+            INSERT INTO document_stats (user_id, dimension, bucket, doc_count)
+            SELECT :user_id, 'total', 'all', count(*) FROM documents WHERE user_id = :user_id AND deleted_at IS NULL
+            UNION ALL
+            SELECT :user_id, 'status', status, count(*) FROM documents WHERE user_id = :user_id AND deleted_at IS NULL GROUP BY status
+            UNION ALL
+            SELECT :user_id, 'risk_score', risk_score, count(*) FROM documents WHERE user_id = :user_id AND deleted_at IS NULL GROUP BY risk_score
+            UNION ALL
+            SELECT :user_id, 'contract_type', COALESCE(contract_type, :unspecified), count(*)
+            FROM documents WHERE user_id = :user_id AND deleted_at IS NULL GROUP BY COALESCE(contract_type, :unspecified)
+            """
+        ),
+        {"user_id": user_id, "unspecified": UNSPECIFIED},
+    )
+
+
+def get_document_stats(db: Session, user_id: uuid.UUID) -> dict:
+    rows = db.execute(
+        text("SELECT dimension, bucket, doc_count FROM document_stats WHERE user_id = :user_id"),
+        {"user_id": user_id},
+    ).all()
+
+    stats: dict = {"total": 0, **{f"by_{d}": {} for d in STAT_DIMENSIONS}}
+    for dimension, bucket, count in rows:
+        if dimension == "total":
+            stats["total"] = count
+        elif count:
+            stats[f"by_{dimension}"][bucket] = count
+
+    windows = ", ".join(
+        f"count(*) FILTER (WHERE expiry_date < now() + interval '{days} days') AS within_{days}"
+        for days in EXPIRY_WINDOWS_DAYS
+    )
+    expiring = db.execute(
+        text(
+            f"""
+            SELECT {windows}
+            FROM documents
+            WHERE user_id = :user_id
+              AND deleted_at IS NULL
+              AND expiry_date >= now()
+              AND expiry_date < now() + interval '{max(EXPIRY_WINDOWS_DAYS)} days'
+            """
+        ),
+        {"user_id": user_id},
+    ).mappings().one()
+    stats["expiring"] = {str(days): expiring[f"within_{days}"] for days in EXPIRY_WINDOWS_DAYS}
+    return stats
@@ -0,0 +1,109 @@
+"""
+Periodic recomputation of contract status and risk from `expiry_date`.
+
+Each run walks `ix_documents_expiry_open` (a partial index over documents
+that are not yet Expired), so it only visits rows that can still cross a
+threshold. Rows are updated in small set-based batches, each in its own
+transaction with `lock_timeout`/`statement_timeout` and `SKIP LOCKED`, so a
+run never holds locks long enough to stall interactive requests. A
+session-level advisory lock keeps concurrent workers from running at once.
+"""
+from __future__ import annotations
+
+import time
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from ..config import settings
+from ..database import engine
+from .stats import apply_stat_deltas, document_stat_keys
+from .versions import bump_documents_version
+
+RENEWAL_WINDOW_DAYS = 30
+_ADVISORY_LOCK_KEY = 0x436F6E7472616374  # arbitrary, unique to this job
+
+# (name, extra predicate, new status, new risk score); each predicate is
+# combined with the partial index condition `status <> 'Expired'`
+_TRANSITIONS = (
+    ("expire", "expiry_date < now()", "'Expired'", "'High'"),
+    (
+        "renewal_due",
+        f"status <> 'Renewal Due' AND expiry_date >= now() AND expiry_date < now() + interval '{RENEWAL_WINDOW_DAYS} days'",
+        "'Renewal Due'",
+        "CASE WHEN d.risk_score = 'Low' THEN 'Medium' ELSE d.risk_score END",
+    ),
+)
+
+
+def _run_batch(conn: Connection, predicate: str, new_status: str, new_risk: str, batch_size: int) -> int:
+    conn.execute(text(f"SET LOCAL lock_timeout = '{settings.status_refresh_lock_timeout_ms}ms'"))
+    conn.execute(text(f"SET LOCAL statement_timeout = '{settings.status_refresh_statement_timeout_ms}ms'"))
+    rows = conn.execute(
+        text(
+            f"""
+            WITH batch AS (
+                SELECT doc_id, status AS old_status, risk_score AS old_risk
+                FROM documents
+                WHERE status <> 'Expired' AND deleted_at IS NULL AND {predicate}
+                ORDER BY expiry_date
+                LIMIT :batch_size
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE documents d
+            SET status = {new_status}, risk_score = {new_risk}, version = d.version + 1
+            FROM batch b
+            WHERE d.doc_id = b.doc_id
+            RETURNING d.user_id, b.old_status, b.old_risk, d.status, d.risk_score, d.contract_type
+            """
+        ),
+        {"batch_size": batch_size},
+    ).all()
+    deltas: Counter = Counter()
+    for user_id, old_status, old_risk, status, risk_score, contract_type in rows:
+        for key in document_stat_keys(user_id, old_status, old_risk, contract_type):
+            deltas[key] -= 1
+        for key in document_stat_keys(user_id, status, risk_score, contract_type):
+            deltas[key] += 1
+    apply_stat_deltas(conn, deltas)
+    bump_documents_version(conn, (r[0] for r in rows))
+    return len(rows)
+
+
+def refresh_document_statuses(conn: Connection) -> int:
+    """
+    Run one bounded pass over all transitions and return the number of rows
+    updated. Returns 0 without doing anything if another worker holds the job
+    lock. Stops early (to retry next run) if a batch hits a lock or statement
+    timeout.
+    """
+    batch_size = settings.status_refresh_batch_size
+    if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}).scalar():
+        conn.rollback()
+        return 0
+    conn.commit()
+    updated = 0
+    try:
+        for _name, predicate, new_status, new_risk in _TRANSITIONS:
+            for _ in range(settings.status_refresh_max_batches):
+                try:
+                    n = _run_batch(conn, predicate, new_status, new_risk, batch_size)
+                    conn.commit()
+                except OperationalError:
+                    conn.rollback()
+                    return updated
+                updated += n
+                if n < batch_size:
+                    break
+                time.sleep(settings.status_refresh_batch_pause_ms / 1000)
+    finally:
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        conn.commit()
+    return updated
+
+
+def run_status_refresh() -> int:
+    with engine.connect() as conn:
+        return refresh_document_statuses(conn)
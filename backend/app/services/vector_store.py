@@ -0,0 +1,687 @@
+"""
+Vector store backends for chunk embeddings.
+
+`PgVectorStore` searches `chunks.embedding` with pgvector; the chunk rows are
+the index, so add/delete are no-ops. `NumpyVectorStore` keeps each tenant's
+embeddings in memory-mapped float32 files on local disk and searches them
+in-process, so small tenants and tests need no Postgres round trip for the
+nearest-neighbour step.
+
+Each store serves one embedding model: the legacy model reads
+`chunks.embedding`, any other model its rows of `chunk_embeddings`.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from .chunk_metadata import METADATA_COLUMNS, row_metadata
+from .embeddings import LEGACY_MODEL, EmbeddingModel, get_embedding_model, vector_array_literal, vector_literal
+from .quantization import candidate_count, coarse_distance_sql, model_column, set_hnsw_search_params
+
+STREAM_BATCH_ROWS = 50
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+@dataclass
+class VectorItem:
+    chunk_id: uuid.UUID
+    doc_id: uuid.UUID
+    embedding: Sequence[float]
+
+
+@dataclass
+class SearchFilters:
+    doc_ids: Optional[Sequence[uuid.UUID]] = None
+
+
+@dataclass
+class SearchHit:
+    chunk_id: uuid.UUID
+    doc_id: uuid.UUID
+    relevance: float
+    text_chunk: Optional[str] = None
+    metadata: Optional[dict] = None
+
+
+@dataclass
+class DocumentHits:
+    doc_id: uuid.UUID
+    filename: str
+    contract_type: Optional[str]
+    relevance: float  # best chunk relevance in the document
+    hits: List[SearchHit] = field(default_factory=list)
+
+
+class VectorStore(ABC):
+    """Interface shared by the vector store backends"""
+
+    @abstractmethod
+    def add(self, db: Session, user_id: uuid.UUID, items: Sequence[VectorItem]) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, db: Session, user_id: uuid.UUID, doc_ids: Sequence[uuid.UUID]) -> None:
+        ...
+
+    @abstractmethod
+    def search(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvec: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[SearchHit]:
+        ...
+
+    def search_many(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvecs: Sequence[Sequence[float]],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[SearchHit]]:
+        """Top-k for each query vector; backends override this with a single pass"""
+        return [self.search(db, user_id, qvec, top_k, filters) for qvec in qvecs]
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """Drop anything held outside Postgres for the tenant; it is rebuilt on next use"""
+        pass
+
+    def stream_search(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvec: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> Iterator[SearchHit]:
+        """Hits in rank order as they become available; same results as `search`"""
+        yield from self.search(db, user_id, qvec, top_k, filters)
+
+    def search_grouped(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvec: Sequence[float],
+        max_documents: int,
+        per_document: int,
+        candidates: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[DocumentHits]:
+        """
+        Best `per_document` chunks for each of the best `max_documents`
+        documents among the `candidates` nearest chunks, with document
+        filename and type attached.
+        """
+        groups: Dict[uuid.UUID, List[SearchHit]] = {}
+        for h in self.search(db, user_id, qvec, candidates, filters):
+            doc_hits = groups.setdefault(h.doc_id, [])
+            if len(doc_hits) < per_document:
+                doc_hits.append(h)
+        # Hits arrive best first, so dict order is document rank order
+        top_docs = list(groups.items())[:max_documents]
+        if not top_docs:
+            return []
+        load_hit_payloads(db, [h for _, hits in top_docs for h in hits])
+        docs = {
+            r["doc_id"]: r
+            for r in db.execute(
+                text("SELECT doc_id, filename, contract_type FROM documents "
+                     "WHERE doc_id = ANY(:doc_ids) AND deleted_at IS NULL"),
+                {"doc_ids": [doc_id for doc_id, _ in top_docs]},
+            ).mappings()
+        }
+        return [
+            DocumentHits(
+                doc_id=doc_id,
+                filename=docs[doc_id]["filename"],
+                contract_type=docs[doc_id]["contract_type"],
+                relevance=hits[0].relevance,
+                hits=[h for h in hits if h.text_chunk is not None],
+            )
+            for doc_id, hits in top_docs
+            if doc_id in docs
+        ]
+
+
+class PgVectorStore(VectorStore):
+    def __init__(self, model: EmbeddingModel = LEGACY_MODEL):
+        self.model = model
+
+    def add(self, db: Session, user_id: uuid.UUID, items: Sequence[VectorItem]) -> None:
+        # Embeddings are written with the chunk rows themselves
+        pass
+
+    def delete(self, db: Session, user_id: uuid.UUID, doc_ids: Sequence[uuid.UUID]) -> None:
+        # Embeddings go away with the chunk rows themselves
+        pass
+
+    def search(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvec: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[SearchHit]:
+        mode = settings.embedding_quantization
+        params: Dict[str, object] = {"qvec": vector_literal(qvec)}
+        sql = text(self._top_k_sql(mode, "CAST(:qvec AS vector)", filters, params, user_id, top_k))
+        set_hnsw_search_params(db, params["candidates"])
+        return [self._hit(r) for r in db.execute(sql, params).mappings()]
+
+    def stream_search(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvec: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> Iterator[SearchHit]:
+        mode = settings.embedding_quantization
+        params: Dict[str, object] = {"qvec": vector_literal(qvec)}
+        sql = text(self._top_k_sql(mode, "CAST(:qvec AS vector)", filters, params, user_id, top_k))
+        set_hnsw_search_params(db, params["candidates"])
+        # Server-side cursor: rows are fetched in small batches instead of
+        # materialising the whole result on the client
+        result = db.execute(sql, params, execution_options={"stream_results": True, "yield_per": STREAM_BATCH_ROWS})
+        for r in result.mappings():
+            yield self._hit(r)
+
+    def search_grouped(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvec: Sequence[float],
+        max_documents: int,
+        per_document: int,
+        candidates: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[DocumentHits]:
+        mode = settings.embedding_quantization
+        params: Dict[str, object] = {
+            "qvec": vector_literal(qvec),
+            "max_documents": max_documents,
+            "per_document": per_document,
+        }
+        # Window functions rank chunks within each document of the ANN
+        # candidate set; the top documents are joined to their metadata
+        sql = text(
+            f"""
+            WITH candidates AS ({self._top_k_sql(mode, "CAST(:qvec AS vector)", filters, params, user_id, candidates)}),
+            ranked AS (
+                SELECT c.*,
+                       row_number() OVER (PARTITION BY doc_id ORDER BY relevance DESC) AS doc_rank,
+                       max(relevance) OVER (PARTITION BY doc_id) AS doc_relevance
+                FROM candidates c
+            ),
+            top_docs AS (
+                SELECT doc_id, doc_relevance FROM ranked
+                WHERE doc_rank = 1
+                ORDER BY doc_relevance DESC
+                LIMIT :max_documents
+            )
+            SELECT r.chunk_id, r.doc_id, r.text_chunk, r.chunk_metadata, r.page, r.clause_type, r.confidence,
+                   r.relevance, r.doc_relevance,
+                   d.filename, d.contract_type
+            FROM ranked r
+            JOIN top_docs t ON t.doc_id = r.doc_id
+            JOIN documents d ON d.doc_id = r.doc_id
+            WHERE r.doc_rank <= :per_document
+            ORDER BY r.doc_relevance DESC, r.doc_id, r.doc_rank
+            """
+        )
+        set_hnsw_search_params(db, params["candidates"])
+        groups: Dict[uuid.UUID, DocumentHits] = {}
+        for r in db.execute(sql, params).mappings():
+            group = groups.get(r["doc_id"])
+            if group is None:
+                group = groups[r["doc_id"]] = DocumentHits(
+                    doc_id=r["doc_id"],
+                    filename=r["filename"],
+                    contract_type=r["contract_type"],
+                    relevance=float(r["doc_relevance"]),
+                )
+            group.hits.append(self._hit(r))
+        return list(groups.values())
+
+    def search_many(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvecs: Sequence[Sequence[float]],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[SearchHit]]:
+        if not qvecs:
+            return []
+        mode = settings.embedding_quantization
+        params: Dict[str, object] = {"qvecs": vector_array_literal(qvecs)}
+        # One statement for the whole batch: each query vector drives its own
+        # index-ordered top-k through a LATERAL join
+        sql = text(
+            f"""
+            SELECT q.ord, hits.chunk_id, hits.doc_id, hits.text_chunk, hits.chunk_metadata,
+                   hits.page, hits.clause_type, hits.confidence, hits.relevance
+            FROM unnest(CAST(:qvecs AS vector[])) WITH ORDINALITY AS q(qvec, ord)
+            CROSS JOIN LATERAL ({self._top_k_sql(mode, "q.qvec", filters, params, user_id, top_k)}) AS hits
+            ORDER BY q.ord, hits.relevance DESC
+            """
+        )
+        set_hnsw_search_params(db, params["candidates"])
+        results: List[List[SearchHit]] = [[] for _ in qvecs]
+        for r in db.execute(sql, params).mappings():
+            results[r["ord"] - 1].append(self._hit(r))
+        return results
+
+    def _top_k_sql(
+        self,
+        mode: str,
+        query: str,
+        filters: Optional[SearchFilters],
+        params: Dict[str, object],
+        user_id: uuid.UUID,
+        top_k: int,
+    ) -> str:
+        """
+        Top-k subquery for the vector expression `query`: a coarse ANN pass
+        over the (possibly quantized) index, then exact cosine re-ranking of
+        the candidates against full-precision vectors. Adds its bind values
+        to `params`.
+        """
+        params.update({
+            "user_id": user_id,
+            "candidates": candidate_count(mode, top_k, settings.rerank_candidates_factor),
+            "top_k": top_k,
+        })
+        # Chunks of soft-deleted documents linger until reclaimed
+        where = (
+            "user_id = :user_id AND doc_id NOT IN "
+            "(SELECT doc_id FROM documents WHERE user_id = :user_id AND deleted_at IS NOT NULL)"
+        )
+        if filters and filters.doc_ids is not None:
+            where += " AND doc_id = ANY(:doc_ids)"
+            params["doc_ids"] = list(filters.doc_ids)
+        if not self.model.legacy:
+            return self._model_top_k_sql(mode, query, where)
+        return f"""
+            SELECT chunk_id, doc_id, text_chunk, {METADATA_COLUMNS}, 1 - (embedding <=> {query}) AS relevance
+            FROM (
+                SELECT chunk_id, doc_id, text_chunk, {METADATA_COLUMNS}, embedding
+                FROM chunks
+                WHERE {where}
+                ORDER BY {coarse_distance_sql(mode, query)}
+                LIMIT :candidates
+            ) AS candidates
+            ORDER BY embedding <=> {query}
+            LIMIT :top_k
+        """
+
+    def _model_top_k_sql(self, mode: str, query: str, where: str) -> str:
+        """
+        `_top_k_sql` over the model's rows of `chunk_embeddings`; the ANN
+        pass runs on the embeddings alone and only the top-k are joined to
+        their chunks. The model id is inlined so the partial index matches.
+        """
+        column = model_column(self.model)
+        metadata = ", ".join(f"c.{name}" for name in METADATA_COLUMNS.split(", "))
+        return f"""
+            SELECT c.chunk_id, c.doc_id, c.text_chunk, {metadata}, 1 - (candidates.embedding <=> {query}) AS relevance
+            FROM (
+                SELECT chunk_id, {column} AS embedding
+                FROM chunk_embeddings
+                WHERE model_id = '{self.model.model_id}' AND {where}
+                ORDER BY {coarse_distance_sql(mode, query, column, self.model.dim)}
+                LIMIT :candidates
+            ) AS candidates
+            JOIN chunks c ON c.chunk_id = candidates.chunk_id
+            ORDER BY candidates.embedding <=> {query}
+            LIMIT :top_k
+        """
+
+    @staticmethod
+    def _hit(row) -> SearchHit:
+        return SearchHit(
+            chunk_id=row["chunk_id"],
+            doc_id=row["doc_id"],
+            relevance=float(row["relevance"]),
+            text_chunk=row["text_chunk"],
+            metadata=row_metadata(row),
+        )
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    One directory per tenant holding a `meta.json` (live row count, row
+    capacity and current generation) and one directory per generation with
+    three memory-mapped arrays that share the capacity (`vectors.f32`,
+    `chunk_ids.bin`, `doc_ids.bin`). Vectors are stored L2-normalised so
+    cosine similarity is a single matrix-vector product.
+
+    Writers take a per-tenant lock (thread lock plus `flock` where
+    available). Appends fill rows past the published count, so readers never
+    see them half written. Anything that moves or drops rows (delete,
+    rebuild) writes a new generation and swaps `meta.json` to it with
+    `os.replace`. Readers take no lock: they map whichever generation
+    `meta.json` names, on every call, so all workers see committed rows.
+    """
+
+    _ID_DTYPE = np.dtype("V16")
+    _MIN_CAPACITY = 1024
+    _OPEN_ATTEMPTS = 3
+
+    def __init__(self, root: str, model: EmbeddingModel = LEGACY_MODEL):
+        self.root = Path(root)
+        self.model = model
+        self.dim = model.dim
+        self._locks: Dict[uuid.UUID, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # -- storage helpers -------------------------------------------------
+
+    def _tenant_dir(self, user_id: uuid.UUID) -> Path:
+        return self.root / str(user_id)
+
+    @staticmethod
+    def _generation_dir(tenant_dir: Path, generation: str) -> Path:
+        return tenant_dir / f"gen-{generation}"
+
+    def _read_meta(self, tenant_dir: Path) -> Optional[dict]:
+        try:
+            with open(tenant_dir / "meta.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        # Files from before generations are rebuilt like a missing index
+        return meta if "generation" in meta else None
+
+    def _write_meta(self, tenant_dir: Path, count: int, capacity: int, generation: str) -> None:
+        tmp = tenant_dir / "meta.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"count": count, "capacity": capacity, "dim": self.dim, "generation": generation}, f)
+        os.replace(tmp, tenant_dir / "meta.json")
+
+    def _open(self, gen_dir: Path, capacity: int, mode: str):
+        vectors = np.memmap(gen_dir / "vectors.f32", dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        chunk_ids = np.memmap(gen_dir / "chunk_ids.bin", dtype=self._ID_DTYPE, mode=mode, shape=(capacity,))
+        doc_ids = np.memmap(gen_dir / "doc_ids.bin", dtype=self._ID_DTYPE, mode=mode, shape=(capacity,))
+        return vectors, chunk_ids, doc_ids
+
+    def _open_published(self, tenant_dir: Path):
+        """
+        Meta and read-only arrays of the published generation, or None if
+        there is none. A writer may swap generations and remove the old one
+        between reading the meta and opening its files, so that is retried.
+        """
+        for _ in range(self._OPEN_ATTEMPTS):
+            meta = self._read_meta(tenant_dir)
+            if meta is None:
+                return None
+            try:
+                gen_dir = self._generation_dir(tenant_dir, meta["generation"])
+                return meta, self._open(gen_dir, meta["capacity"], "r")
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _resize(self, gen_dir: Path, capacity: int) -> None:
+        # Growing the files in place keeps existing rows where they are
+        for name, row_bytes in (
+            ("vectors.f32", 4 * self.dim),
+            ("chunk_ids.bin", self._ID_DTYPE.itemsize),
+            ("doc_ids.bin", self._ID_DTYPE.itemsize),
+        ):
+            with open(gen_dir / name, "ab") as f:
+                f.truncate(capacity * row_bytes)
+
+    def _tenant_lock(self, user_id: uuid.UUID) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(user_id, threading.Lock())
+
+    @contextmanager
+    def _writer(self, user_id: uuid.UUID) -> Iterator[Path]:
+        tenant_dir = self._tenant_dir(user_id)
+        with self._tenant_lock(user_id):
+            tenant_dir.mkdir(parents=True, exist_ok=True)
+            fd = os.open(tenant_dir / ".lock", os.O_CREAT | os.O_RDWR)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield tenant_dir
+            finally:
+                os.close(fd)  # releases the flock
+
+    def _normalise(self, matrix: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, np.float32(1e-12))
+
+    @staticmethod
+    def _id_bytes(ids: Sequence[uuid.UUID]) -> np.ndarray:
+        return np.array([i.bytes for i in ids], dtype=NumpyVectorStore._ID_DTYPE)
+
+    # -- VectorStore -----------------------------------------------------
+
+    def add(self, db: Session, user_id: uuid.UUID, items: Sequence[VectorItem]) -> None:
+        if not items:
+            return
+        with self._writer(user_id) as tenant_dir:
+            if (tenant_dir / ".stale").exists():
+                return  # the next search rebuilds from Postgres, these rows included
+            meta = self._read_meta(tenant_dir)
+            if meta is None:
+                # Not indexed yet: appending would create an index of these
+                # rows alone, hiding the tenant's existing chunks from search
+                (tenant_dir / ".stale").touch()
+                return
+            self._append(tenant_dir, meta, items)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        with self._writer(user_id) as tenant_dir:
+            (tenant_dir / ".stale").touch()
+            (tenant_dir / "meta.json").unlink(missing_ok=True)
+
+    def _append(self, tenant_dir: Path, meta: dict, items: Sequence[VectorItem]) -> None:
+        count, capacity, generation = meta["count"], meta["capacity"], meta["generation"]
+        gen_dir = self._generation_dir(tenant_dir, generation)
+        needed = count + len(items)
+        if needed > capacity:
+            capacity = max(self._MIN_CAPACITY, capacity * 2, needed)
+            self._resize(gen_dir, capacity)
+        vectors, chunk_ids, doc_ids = self._open(gen_dir, capacity, "r+")
+        vectors[count:needed] = self._normalise([it.embedding for it in items])
+        chunk_ids[count:needed] = self._id_bytes([it.chunk_id for it in items])
+        doc_ids[count:needed] = self._id_bytes([it.doc_id for it in items])
+        for arr in (vectors, chunk_ids, doc_ids):
+            arr.flush()
+        # Rows become visible to readers only once the count is published
+        self._write_meta(tenant_dir, needed, capacity, generation)
+
+    def _publish(self, tenant_dir: Path, vectors: np.ndarray, chunk_ids: np.ndarray, doc_ids: np.ndarray) -> None:
+        """Write the rows (vectors already normalised) as a new generation and switch readers to it"""
+        generation = uuid.uuid4().hex
+        gen_dir = self._generation_dir(tenant_dir, generation)
+        gen_dir.mkdir()
+        count = len(chunk_ids)
+        capacity = max(self._MIN_CAPACITY, count)
+        self._resize(gen_dir, capacity)
+        new_vectors, new_chunk_ids, new_doc_ids = self._open(gen_dir, capacity, "r+")
+        new_vectors[:count] = vectors
+        new_chunk_ids[:count] = chunk_ids
+        new_doc_ids[:count] = doc_ids
+        for arr in (new_vectors, new_chunk_ids, new_doc_ids):
+            arr.flush()
+        self._write_meta(tenant_dir, count, capacity, generation)
+        # Readers still on an older generation keep their mapping; one about
+        # to open it retries with the new meta
+        for old in tenant_dir.glob("gen-*"):
+            if old != gen_dir:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def delete(self, db: Session, user_id: uuid.UUID, doc_ids: Sequence[uuid.UUID]) -> None:
+        if not doc_ids:
+            return
+        with self._writer(user_id) as tenant_dir:
+            meta = self._read_meta(tenant_dir)
+            if not meta or not meta["count"]:
+                return
+            count = meta["count"]
+            gen_dir = self._generation_dir(tenant_dir, meta["generation"])
+            vectors, chunk_ids, stored_doc_ids = self._open(gen_dir, meta["capacity"], "r")
+            keep = ~np.isin(stored_doc_ids[:count], self._id_bytes(doc_ids))
+            if keep.all():
+                return
+            self._publish(tenant_dir, vectors[:count][keep], chunk_ids[:count][keep], stored_doc_ids[:count][keep])
+
+    def search(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvec: Sequence[float],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[SearchHit]:
+        return self.search_many(db, user_id, [qvec], top_k, filters)[0]
+
+    def search_many(
+        self,
+        db: Session,
+        user_id: uuid.UUID,
+        qvecs: Sequence[Sequence[float]],
+        top_k: int,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[List[SearchHit]]:
+        tenant_dir = self._tenant_dir(user_id)
+        published = self._open_published(tenant_dir)
+        if published is None:
+            # First use of this backend for the tenant: index what is in Postgres
+            self.rebuild(user_id)
+            published = self._open_published(tenant_dir)
+        if published is None:
+            return [[] for _ in qvecs]
+        meta, (vectors, chunk_ids, doc_ids) = published
+        count = meta["count"]
+        if not count or top_k <= 0:
+            return [[] for _ in qvecs]
+        # (count, n_queries) cosine similarities in one matrix product
+        scores = vectors[:count] @ self._normalise(qvecs).T
+        if filters and filters.doc_ids is not None:
+            allowed = np.isin(doc_ids[:count], self._id_bytes(filters.doc_ids))
+            scores[~allowed] = -np.inf
+        k = min(top_k, count)
+        top = np.argpartition(-scores, k - 1, axis=0)[:k]
+        results = []
+        for col in range(scores.shape[1]):
+            rows = top[:, col]
+            rows = rows[np.argsort(-scores[rows, col])]
+            results.append([
+                SearchHit(
+                    chunk_id=uuid.UUID(bytes=bytes(chunk_ids[i])),
+                    doc_id=uuid.UUID(bytes=bytes(doc_ids[i])),
+                    relevance=float(scores[i, col]),
+                )
+                for i in rows
+                if np.isfinite(scores[i, col])
+            ])
+        return results
+
+    def rebuild(self, user_id: uuid.UUID) -> int:
+        """
+        Replace the tenant's files with the embeddings currently in Postgres.
+        Reads the primary: a lagging replica could miss a just-uploaded
+        document, and clearing `.stale` would keep it out of the index.
+        """
+        if self.model.legacy:
+            sql = """
+                SELECT c.chunk_id, c.doc_id, c.embedding::text AS embedding
+                FROM chunks c JOIN documents d ON d.doc_id = c.doc_id
+                WHERE c.user_id = :user_id AND d.deleted_at IS NULL
+            """
+        else:
+            sql = """
+                SELECT e.chunk_id, e.doc_id, e.embedding::text AS embedding
+                FROM chunk_embeddings e JOIN documents d ON d.doc_id = e.doc_id
+                WHERE e.user_id = :user_id AND e.model_id = :model_id AND d.deleted_at IS NULL
+            """
+        with self._writer(user_id) as tenant_dir, SessionLocal() as db:
+            # Read under the writer lock, so an `add` or `invalidate` that
+            # marks the tenant stale meanwhile is not cleared by this rebuild
+            rows = db.execute(text(sql), {"user_id": user_id, "model_id": self.model.model_id}).mappings().all()
+            items = [VectorItem(r["chunk_id"], r["doc_id"], json.loads(r["embedding"])) for r in rows]
+            self._replace(tenant_dir, items)
+        return len(items)
+
+    def reset(self, user_id: uuid.UUID, items: Sequence[VectorItem] = ()) -> None:
+        """Replace the tenant's files with `items`, without reading Postgres"""
+        with self._writer(user_id) as tenant_dir:
+            self._replace(tenant_dir, items)
+
+    def _replace(self, tenant_dir: Path, items: Sequence[VectorItem]) -> None:
+        self._publish(
+            tenant_dir,
+            self._normalise([it.embedding for it in items]),
+            self._id_bytes([it.chunk_id for it in items]),
+            self._id_bytes([it.doc_id for it in items]),
+        )
+        (tenant_dir / ".stale").unlink(missing_ok=True)
+
+
+def load_hit_payloads(db: Session, hits: List[SearchHit]) -> List[SearchHit]:
+    """
+    Fill in text and metadata, in place, for hits from backends that only
+    return ids; returns the hits whose chunk still exists.
+    """
+    missing = [h.chunk_id for h in hits if h.text_chunk is None]
+    if not missing:
+        return hits
+    rows = db.execute(
+        text(f"SELECT chunk_id, text_chunk, {METADATA_COLUMNS} FROM chunks WHERE chunk_id = ANY(:ids)"),
+        {"ids": missing},
+    ).mappings()
+    payloads = {r["chunk_id"]: r for r in rows}
+    result = []
+    for h in hits:
+        if h.text_chunk is None:
+            row = payloads.get(h.chunk_id)
+            if row is None:  # chunk deleted since it was indexed
+                continue
+            h.text_chunk, h.metadata = row["text_chunk"], row_metadata(row)
+        result.append(h)
+    return result
+
+
+@lru_cache
+def get_vector_store(model_id: str = LEGACY_MODEL.model_id) -> VectorStore:
+    """The configured backend for one embedding model"""
+    model = get_embedding_model(model_id)
+    backend = settings.vector_store_backend
+    if backend == "pgvector":
+        return PgVectorStore(model)
+    if backend == "numpy":
+        root = settings.vector_store_path
+        if not model.legacy:
+            root = os.path.join(root, model.model_id)
+        return NumpyVectorStore(root, model)
+    raise ValueError(f"Unknown vector store backend {backend!r}, expected 'pgvector' or 'numpy'")
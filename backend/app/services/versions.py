@@ -0,0 +1,68 @@
+"""
+Version stamps behind the ETags of the document list and contract detail.
+
+`users.documents_version` changes whenever the tenant's document list can
+change (upload, delete, status/risk refresh) and `documents.version`
+whenever a document's detail can (its clauses are stored, status/risk
+refresh). Stamps are bumped in the same transaction as the change, so a
+request can answer `If-None-Match` with 304 after reading one integer by
+primary key, before any of the queries that build the response.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Iterable, Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+# Part of every ETag; bump when a response's shape changes so clients
+# holding old representations refetch
+REPRESENTATION_VERSION = 1
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def bump_documents_version(db: Union[Session, Connection], user_ids: Iterable[uuid.UUID]) -> None:
+    """Mark the tenants' document lists changed; does not commit"""
+    # Sorted so concurrent writers lock user rows in the same order
+    ids = sorted(set(user_ids), key=str)
+    if ids:
+        db.execute(
+            text("UPDATE users SET documents_version = documents_version + 1 WHERE user_id = ANY(:user_ids)"),
+            {"user_ids": ids},
+        )
+
+
+def documents_version(db: Session, user_id: uuid.UUID) -> int:
+    return db.execute(
+        text("SELECT documents_version FROM users WHERE user_id = :user_id"),
+        {"user_id": user_id},
+    ).scalar() or 0
+
+
+def document_version(db: Session, user_id: uuid.UUID, doc_id: uuid.UUID) -> Optional[int]:
+    """The live document's version, or None if the tenant has no such document"""
+    return db.execute(
+        text(
+            "SELECT version FROM documents "
+            "WHERE doc_id = :doc_id AND user_id = :user_id AND deleted_at IS NULL"
+        ),
+        {"doc_id": doc_id, "user_id": user_id},
+    ).scalar()
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag from the stamps (and query parameters) a response depends on"""
+    return '"' + "-".join(str(p) for p in (f"r{REPRESENTATION_VERSION}", *parts)) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """`If-None-Match` check; uses weak comparison, as RFC 9110 requires for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
@@ -0,0 +1,72 @@
+"""Initial schema
+
+Exactly what the app used to create with Base.metadata.create_all at
+startup before any of the later features, so databases created that way
+are stamped at this revision by scripts/migrate_db.py and then upgraded.
+The embedding index is not part of it: scripts/migrate_db.py creates the
+one for EMBEDDING_QUANTIZATION.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# services.embeddings.EMBEDDING_DIM at the time of this migration
+EMBEDDING_DIM = 4
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    op.create_table(
+        "users",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("username", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+    )
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "documents",
+        sa.Column("doc_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+        sa.Column("filename", sa.String(512), nullable=False),
+        sa.Column("uploaded_on", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("expiry_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("status", sa.String(32), nullable=False),
+        sa.Column("risk_score", sa.String(16), nullable=False),
+        sa.Column("parties", sa.Text(), nullable=True),
+        sa.Column("contract_type", sa.String(100), nullable=True),
+    )
+    op.create_index("ix_documents_user_id", "documents", ["user_id"])
+
+    op.create_table(
+        "chunks",
+        sa.Column("chunk_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("doc_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("documents.doc_id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+        sa.Column("text_chunk", sa.Text(), nullable=False),
+        sa.Column("embedding", Vector(EMBEDDING_DIM), nullable=False),
+        sa.Column("chunk_metadata", sa.JSON(), nullable=False),
+    )
+    op.create_index("ix_chunks_doc_id", "chunks", ["doc_id"])
+    op.create_index("ix_chunks_user_id", "chunks", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("chunks")
+    op.drop_table("documents")
+    op.drop_table("users")
@@ -0,0 +1,122 @@
+"""Document lifecycle, dashboard counters, similarity and admission tables
+
+Everything the app came to need on top of the initial schema before it
+moved to migrations:
+- On documents: the soft-delete marker, the content hash used to
+  deduplicate uploads, and the MinHash signature.
+- The document_stats, document_lsh_bands and rate_limit_buckets tables.
+- The documents indexes behind the dashboard, the status refresh job,
+  deletion and deduplication.
+
+Workers of those versions ran create_all at startup, which creates missing
+tables and the indexes of new tables but never alters an existing one. So
+a database can hold any subset of this. Every step is therefore a no-op
+when its object already exists. Indexes on documents are built
+CONCURRENTLY. document_stats is filled from documents when this migration
+creates it.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# services.stats.UNSPECIFIED at the time of this migration
+UNSPECIFIED = "Unspecified"
+
+_FILL_DOCUMENT_STATS = f"""
+    INSERT INTO document_stats (user_id, dimension, bucket, doc_count)
+    SELECT user_id, 'total', 'all', count(*) FROM documents WHERE deleted_at IS NULL GROUP BY user_id
+    UNION ALL
+    SELECT user_id, 'status', status, count(*) FROM documents WHERE deleted_at IS NULL GROUP BY user_id, status
+    UNION ALL
+    SELECT user_id, 'risk_score', risk_score, count(*) FROM documents WHERE deleted_at IS NULL GROUP BY user_id, risk_score
+    UNION ALL
+    SELECT user_id, 'contract_type', COALESCE(contract_type, '{UNSPECIFIED}'), count(*)
+    FROM documents WHERE deleted_at IS NULL GROUP BY user_id, COALESCE(contract_type, '{UNSPECIFIED}')
+"""
+
+
+def _has_table(name: str) -> bool:
+    # Offline (--sql) scripts target a database without these tables
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64)")
+    op.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS minhash BYTEA")
+    op.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP WITH TIME ZONE")
+
+    if not _has_table("document_stats"):
+        op.create_table(
+            "document_stats",
+            sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("dimension", sa.String(32), primary_key=True),
+            sa.Column("bucket", sa.String(100), primary_key=True),
+            sa.Column("doc_count", sa.Integer(), nullable=False),
+        )
+        op.execute(_FILL_DOCUMENT_STATS)
+
+    if not _has_table("document_lsh_bands"):
+        op.create_table(
+            "document_lsh_bands",
+            sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("band", sa.SmallInteger(), primary_key=True),
+            sa.Column("bucket", sa.BigInteger(), primary_key=True),
+            sa.Column("doc_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("documents.doc_id", ondelete="CASCADE"), primary_key=True),
+        )
+    op.create_index("ix_document_lsh_bands_doc_id", "document_lsh_bands", ["doc_id"], if_not_exists=True)
+
+    if not _has_table("rate_limit_buckets"):
+        op.create_table(
+            "rate_limit_buckets",
+            sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("request_class", sa.String(16), primary_key=True),
+            sa.Column("tokens", sa.Float(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_user_expiry", "documents", ["user_id", "expiry_date"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_documents_expiry_open", "documents", ["expiry_date"],
+            postgresql_where=sa.text("status <> 'Expired'"), postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_documents_deleted", "documents", ["user_id"],
+            postgresql_where=sa.text("deleted_at IS NOT NULL"), postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ux_documents_user_content", "documents", ["user_id", "content_sha256"],
+            unique=True, postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_documents_user_content", table_name="documents")
+    op.drop_index("ix_documents_deleted", table_name="documents")
+    op.drop_index("ix_documents_expiry_open", table_name="documents")
+    op.drop_index("ix_documents_user_expiry", table_name="documents")
+    op.drop_table("rate_limit_buckets")
+    op.drop_table("document_lsh_bands")
+    op.drop_table("document_stats")
+    op.drop_column("documents", "deleted_at")
+    op.drop_column("documents", "minhash")
+    op.drop_column("documents", "content_sha256")
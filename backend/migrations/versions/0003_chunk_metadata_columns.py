@@ -0,0 +1,92 @@
+"""Typed chunk metadata columns
+
+Moves `page`, `clause_type` and `confidence` out of the chunk_metadata JSON
+blob into typed columns, stores the rest of the blob as JSONB, and indexes
+(doc_id, page) and (doc_id, clause_type, page).
+
+Existing rows are copied in batches of BACKFILL_BATCH_SIZE, one transaction
+each, into new columns alongside the old one, so no long lock is held on
+chunks while it runs. Rows written in the meantime are caught up in the
+short transaction that swaps the JSONB column in. Indexes are built
+CONCURRENTLY.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+_COPY = """
+    UPDATE chunks
+    SET page = CASE WHEN m ->> 'page' ~ '^-?[0-9]+$' THEN (m ->> 'page')::int END,
+        clause_type = left(m ->> 'clause_type', 64),
+        confidence = CASE WHEN jsonb_typeof(m -> 'confidence') = 'number' THEN (m ->> 'confidence')::float8 END,
+        chunk_metadata_jsonb = m - 'page' - 'clause_type' - 'confidence'
+    FROM (
+        SELECT chunk_id AS id, coalesce(chunk_metadata::jsonb, '{{}}'::jsonb) AS m
+        FROM chunks
+        WHERE chunk_metadata_jsonb IS NULL
+        {limit}
+    ) AS src
+    WHERE chunks.chunk_id = src.id
+"""
+
+
+def upgrade() -> None:
+    op.add_column("chunks", sa.Column("page", sa.Integer(), nullable=True))
+    op.add_column("chunks", sa.Column("clause_type", sa.String(64), nullable=True))
+    op.add_column("chunks", sa.Column("confidence", sa.Float(), nullable=True))
+    op.add_column("chunks", sa.Column("chunk_metadata_jsonb", postgresql.JSONB(), nullable=True))
+
+    # Offline (--sql) scripts skip the loop; the catch-up below copies everything
+    if not op.get_context().as_sql:
+        with op.get_context().autocommit_block():
+            bind = op.get_bind()
+            while bind.execute(sa.text(_COPY.format(limit=f"LIMIT {BACKFILL_BATCH_SIZE}"))).rowcount:
+                pass
+
+    # Rows inserted by workers still running the old code since the loop
+    # finished, then swap the columns
+    op.execute(_COPY.format(limit=""))
+    op.drop_column("chunks", "chunk_metadata")
+    op.alter_column("chunks", "chunk_metadata_jsonb", new_column_name="chunk_metadata")
+    op.alter_column("chunks", "chunk_metadata", nullable=False, server_default=sa.text("'{}'::jsonb"))
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_chunks_doc_page", "chunks", ["doc_id", "page"], postgresql_concurrently=True)
+        op.create_index(
+            "ix_chunks_doc_clause_page", "chunks", ["doc_id", "clause_type", "page"], postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chunks_doc_clause_page", table_name="chunks")
+    op.drop_index("ix_chunks_doc_page", table_name="chunks")
+    op.add_column("chunks", sa.Column("chunk_metadata_json", sa.JSON(), nullable=True))
+    op.execute(
+        """
+        UPDATE chunks
+        SET chunk_metadata_json = (
+            chunk_metadata
+            || jsonb_strip_nulls(jsonb_build_object('page', page, 'clause_type', clause_type, 'confidence', confidence))
+        )::json
+        """
+    )
+    op.drop_column("chunks", "chunk_metadata")
+    op.drop_column("chunks", "confidence")
+    op.drop_column("chunks", "clause_type")
+    op.drop_column("chunks", "page")
+    op.alter_column("chunks", "chunk_metadata_json", new_column_name="chunk_metadata", nullable=False)
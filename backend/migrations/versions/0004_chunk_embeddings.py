@@ -0,0 +1,56 @@
+"""Versioned chunk embeddings
+
+Adds `chunk_embeddings`, holding chunk embeddings per non-legacy model id,
+and `tenant_embedding_state`, recording the model each tenant is searched
+with and any re-embedding in progress. Also indexes chunks by
+(user_id, chunk_id) for the re-embedding job's keyset pagination, built
+CONCURRENTLY. The per-model HNSW indexes are created by scripts/migrate_db.py
+like the chunks one.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chunk_embeddings",
+        sa.Column("chunk_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("chunks.chunk_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("model_id", sa.String(64), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+        sa.Column("doc_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("embedding", Vector(), nullable=False),
+    )
+    op.create_index("ix_chunk_embeddings_user_model", "chunk_embeddings", ["user_id", "model_id"])
+
+    op.create_table(
+        "tenant_embedding_state",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("active_model", sa.String(64), server_default=sa.text("'hash-v1'"), nullable=False),
+        sa.Column("target_model", sa.String(64), nullable=True),
+        sa.Column("backfill_cursor", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_chunks_user_chunk", "chunks", ["user_id", "chunk_id"], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chunks_user_chunk", table_name="chunks")
+    op.drop_table("tenant_embedding_state")
+    op.drop_table("chunk_embeddings")
@@ -0,0 +1,32 @@
+"""Document version stamps
+
+Adds `users.documents_version`, bumped whenever the tenant's document list
+changes, and `documents.version`, bumped whenever a document's detail
+changes. Both back the ETags of the list and detail endpoints. Adding a
+NOT NULL column with a constant default does not rewrite the table.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("documents_version", sa.BigInteger(), server_default=sa.text("0"), nullable=False))
+    op.add_column("documents", sa.Column("version", sa.BigInteger(), server_default=sa.text("1"), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "version")
+    op.drop_column("users", "documents_version")
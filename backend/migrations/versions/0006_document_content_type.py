@@ -0,0 +1,36 @@
+"""Stored original files
+
+Adds `documents.content_type`, the media type of the upload whose bytes are
+now kept in the blob store under `content_sha256`, and indexes
+`content_sha256` on its own (built CONCURRENTLY) for the check whether any
+document still refers to a blob before it is collected.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("content_type", sa.String(127), nullable=True))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_documents_content_sha256", "documents", ["content_sha256"], postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_content_sha256", table_name="documents")
+    op.drop_column("documents", "content_type")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Compute MinHash signatures and LSH bands for documents uploaded before the
+"similar contracts" feature existed.
+"""
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.database import SessionLocal
+from app import models
+from app.services.similarity import index_document
+
+
+def main():
+    db = SessionLocal()
+    try:
+        doc_ids = [d for (d,) in db.query(models.Document.doc_id).filter(
+            models.Document.minhash.is_(None),
+            models.Document.deleted_at.is_(None)
+        ).all()]
+        for doc_id in doc_ids:
+            document = db.get(models.Document, doc_id)
+            texts = [t for (t,) in db.query(models.Chunk.text_chunk).filter(models.Chunk.doc_id == doc_id).all()]
+            index_document(db, document, texts)
+            db.commit()
+        print(f'✅ Indexed {len(doc_ids)} documents')
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
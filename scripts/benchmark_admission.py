@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Latency of one tenant's searches while another tenant floods /query/search
+from many threads, with admission control on and off.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.llama_mock import MOCK_CONTRACT_CLAUSES
+
+
+def tenant(client, name, docs):
+    signup = {"username": f"{name}{uuid.uuid4().hex[:8]}", "password": "testpass123"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(docs):
+        body = "\n".join(f"{c} Ref {i}-{j}." for j, c in enumerate(MOCK_CONTRACT_CLAUSES))
+        client.post("/documents/upload", headers=headers, files={"file": (f"c{i}.txt", body, "text/plain")})
+    return headers
+
+
+def run(client, quiet, noisy, threads, seconds):
+    stop = threading.Event()
+    noisy_status = Counter()
+
+    def flood():
+        while not stop.is_set():
+            r = client.post("/query/search", headers=noisy, json={"query": "termination", "top_k": 20})
+            noisy_status[r.status_code] += 1
+
+    workers = [threading.Thread(target=flood) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        client.post("/query/search", headers=quiet, json={"query": "liability cap", "top_k": 5})
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+    stop.set()
+    for w in workers:
+        w.join()
+    return latencies, noisy_status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32, help="concurrent requests from the noisy tenant")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--docs", type=int, default=50)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    quiet = tenant(client, "quiet", args.docs)
+    noisy = tenant(client, "noisy", args.docs)
+
+    print(f"{'admission':<10} {'quiet p50 ms':>13} {'quiet p99 ms':>13}  noisy responses")
+    for enabled in (False, True):
+        settings.admission_enabled = enabled
+        # Let the noisy tenant's bucket refill between runs
+        time.sleep(settings.search_burst / settings.search_rate_per_second)
+        latencies, noisy_status = run(client, quiet, noisy, args.threads, args.seconds)
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f"{'on' if enabled else 'off':<10} {statistics.median(latencies):>13.2f} {p99:>13.2f}  {dict(noisy_status)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Compare N separate POST /query/search calls with one POST /query/search/batch
+carrying the same N queries.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.llama_mock import MOCK_CONTRACT_CLAUSES
+
+REVIEW_QUERIES = [
+    "termination", "liability cap", "auto-renewal", "payment terms", "confidentiality",
+    "governing law", "indemnification", "force majeure", "intellectual property", "dispute resolution",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    signup = {"username": f"batch{uuid.uuid4().hex[:8]}", "password": "testpass123"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(args.docs):
+        body = "\n".join(f"{c} Ref {i}-{j}." for j, c in enumerate(MOCK_CONTRACT_CLAUSES))
+        client.post("/documents/upload", headers=headers, files={"file": (f"c{i}.txt", body, "text/plain")})
+
+    queries = [f"{REVIEW_QUERIES[i % len(REVIEW_QUERIES)]} {i}" for i in range(args.queries)]
+    single, batch = [], []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        for q in queries:
+            client.post("/query/search", headers=headers, json={"query": q, "top_k": args.top_k})
+        single.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        client.post("/query/search/batch", headers=headers, json={"queries": queries, "top_k": args.top_k})
+        batch.append((time.perf_counter() - start) * 1000)
+
+    one = statistics.median(single) / args.queries
+    print(f"single query:            {one:.2f} ms")
+    print(f"{args.queries} single queries:      {statistics.median(single):.2f} ms")
+    print(f"batch of {args.queries}:             {statistics.median(batch):.2f} ms ({statistics.median(batch) / one:.1f}x one query)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Compare the old chunk layout (page/clause_type/confidence inside a JSON
+blob) with the typed-column layout: average row size and contract detail
+query latency. Builds both layouts as temporary tables with the same data.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import orjson
+from sqlalchemy import text
+
+from app.database import engine
+from app.services.embeddings import EMBEDDING_DIM
+
+CLAUSE_TYPES = ["termination", "liability", "payment", "confidentiality", "intellectual_property", "general"]
+
+OLD_DETAIL = text(
+    "SELECT chunk_id, doc_id, user_id, text_chunk, embedding, chunk_metadata FROM bench_chunks_json WHERE doc_id = :d"
+)
+NEW_DETAIL = text(
+    "SELECT text_chunk, clause_type, page, confidence FROM bench_chunks_typed "
+    "WHERE doc_id = :d ORDER BY page LIMIT 6"
+)
+NEW_DETAIL_BY_TYPE = text(
+    "SELECT text_chunk, clause_type, page, confidence FROM bench_chunks_typed "
+    "WHERE doc_id = :d AND clause_type = :t ORDER BY page LIMIT 6"
+)
+
+
+def timed(conn, stmt, params_list, consume):
+    latencies = []
+    for params in params_list:
+        start = time.perf_counter()
+        consume(conn.execute(stmt, params).all())
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2_000)
+    parser.add_argument("--chunks-per-doc", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    doc_ids = [uuid.uuid4() for _ in range(args.docs)]
+    user_id = uuid.uuid4()
+    rows = []
+    for d in doc_ids:
+        for i in range(args.chunks_per_doc):
+            rows.append({
+                "c": uuid.uuid4(), "d": d, "u": user_id,
+                "t": f"Clause {i} text of the contract, long enough to look like a real paragraph.",
+                "e": "[" + ",".join(f"{rng.uniform(-1, 1):.4f}" for _ in range(EMBEDDING_DIM)) + "]",
+                "page": i // 3 + 1,
+                "clause_type": rng.choice(CLAUSE_TYPES),
+                "confidence": round(rng.uniform(0.7, 0.95), 2),
+                "extra": {"contract_name": f"contract_{d.hex[:8]}.pdf"},
+            })
+
+    with engine.connect() as conn:
+        conn.execute(text(
+            "CREATE TEMP TABLE bench_chunks_json (chunk_id uuid PRIMARY KEY, doc_id uuid NOT NULL, user_id uuid NOT NULL, "
+            "text_chunk text NOT NULL, embedding vector NOT NULL, chunk_metadata json NOT NULL)"
+        ))
+        conn.execute(text("CREATE INDEX ON bench_chunks_json (doc_id)"))
+        conn.execute(text(
+            "CREATE TEMP TABLE bench_chunks_typed (chunk_id uuid PRIMARY KEY, doc_id uuid NOT NULL, user_id uuid NOT NULL, "
+            "text_chunk text NOT NULL, embedding vector NOT NULL, page int, clause_type varchar(64), confidence float8, "
+            "chunk_metadata jsonb NOT NULL DEFAULT '{}')"
+        ))
+        conn.execute(text("CREATE INDEX ON bench_chunks_typed (doc_id, page)"))
+        conn.execute(text("CREATE INDEX ON bench_chunks_typed (doc_id, clause_type, page)"))
+        conn.execute(
+            text("INSERT INTO bench_chunks_json VALUES (:c, :d, :u, :t, CAST(:e AS vector), CAST(:m AS json))"),
+            [{**r, "m": orjson.dumps({**r["extra"], "page": r["page"], "clause_type": r["clause_type"],
+                                       "confidence": r["confidence"]}).decode()} for r in rows],
+        )
+        conn.execute(
+            text("INSERT INTO bench_chunks_typed VALUES (:c, :d, :u, :t, CAST(:e AS vector), :page, :clause_type, "
+                 ":confidence, CAST(:m AS jsonb))"),
+            [{**r, "m": orjson.dumps(r["extra"]).decode()} for r in rows],
+        )
+        conn.execute(text("ANALYZE bench_chunks_json"))
+        conn.execute(text("ANALYZE bench_chunks_typed"))
+
+        print(f"{len(rows)} chunks in {args.docs} documents")
+        for table in ("bench_chunks_json", "bench_chunks_typed"):
+            row_bytes, meta_bytes = conn.execute(text(
+                f"SELECT avg(pg_column_size(t.*)), avg(pg_column_size(t.chunk_metadata)) FROM {table} t"
+            )).one()
+            total = conn.execute(text(f"SELECT pg_total_relation_size('{table}')")).scalar()
+            print(f"{table:<20} row {row_bytes:6.1f} B  chunk_metadata {meta_bytes:5.1f} B  table+indexes {total / 2**20:6.1f} MiB")
+
+        def old_consume(result):
+            # What get_contract_detail used to do: every chunk, then .get() in Python
+            return [(r.chunk_metadata.get("clause_type"), r.chunk_metadata.get("page"),
+                     r.chunk_metadata.get("confidence")) for r in result[:6]]
+
+        sample = [{"d": rng.choice(doc_ids), "t": rng.choice(CLAUSE_TYPES)} for _ in range(args.queries)]
+        old = timed(conn, OLD_DETAIL, sample, old_consume)
+        new = timed(conn, NEW_DETAIL, sample, list)
+        by_type = timed(conn, NEW_DETAIL_BY_TYPE, sample, list)
+        print(f"detail query p50: JSON blob {old:.2f} ms, typed columns {new:.2f} ms, "
+              f"typed + clause_type filter {by_type:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Cold-start time of API workers: start N fresh Python processes at once, each
+importing the app and running its startup, and report import time, startup
+time and time to the first /ready response per worker.
+
+--with-init-db also runs what startup used to do on every boot (CREATE
+EXTENSION + Base.metadata.create_all), for a before/after comparison.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+WORKER = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from fastapi.testclient import TestClient
+from app.main import app
+imported = time.perf_counter()
+if sys.argv[2] == "1":
+    from sqlalchemy import text
+    from app import models
+    from app.database import Base, engine
+    try:  # the old init_db swallowed failures too
+        with engine.connect() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+            conn.commit()
+        Base.metadata.create_all(bind=engine)
+    except Exception:
+        pass
+with TestClient(app) as client:
+    started = time.perf_counter()
+    status = client.get("/ready").status_code
+    ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "startup": started - imported,
+    "ready": ready - start,
+    "status": status,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--with-init-db", action="store_true")
+    args = parser.parse_args()
+
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, BACKEND, "1" if args.with_init_db else "0"],
+            cwd=BACKEND,  # where .env is read from
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(args.workers)
+    ]
+    results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+
+    print(f"{args.workers} workers started together{' with init_db' if args.with_init_db else ''}")
+    for key in ("import", "startup", "ready"):
+        values = [r[key] * 1000 for r in results]
+        print(f"{key:<8} p50 {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+    print(f"/ready statuses: {sorted(r['status'] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Bytes and SQL statements saved by ETag revalidation under a polling
+workload: a client polls /documents/list and reopens a few contract
+details, once always fetching in full and once sending If-None-Match with
+the last ETag, with an upload every --change-every polls.
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine, read_engine
+from app.main import app
+from app.services.llama_mock import MOCK_CONTRACT_CLAUSES
+
+statements = 0
+
+
+def count_statement(*_args):
+    global statements
+    statements += 1
+
+
+def upload(client, headers, i):
+    body = "\n".join(f"{c} Ref {i}-{j}." for j, c in enumerate(MOCK_CONTRACT_CLAUSES))
+    r = client.post("/documents/upload", headers=headers, files={"file": (f"c{i}.txt", body, "text/plain")})
+    return r.json()["doc_id"]
+
+
+def poll(client, headers, doc_ids, polls, change_every, conditional, next_upload):
+    global statements
+    etags = {}
+    received = 0
+    not_modified = 0
+    statements = 0
+    start = time.perf_counter()
+    for i in range(polls):
+        if change_every and i and i % change_every == 0:
+            # Uploads are not part of the polling cost
+            before = statements
+            upload(client, headers, next_upload)
+            statements = before
+            next_upload += 1
+        for url in ["/documents/list"] + [f"/documents/{d}" for d in doc_ids]:
+            h = dict(headers)
+            if conditional and url in etags:
+                h["If-None-Match"] = etags[url]
+            r = client.get(url, headers=h)
+            received += len(r.content)
+            not_modified += r.status_code == 304
+            etags[url] = r.headers.get("etag")
+    elapsed = time.perf_counter() - start
+    requests = polls * (1 + len(doc_ids))
+    return received, not_modified, statements, requests, elapsed, next_upload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--details", type=int, default=3, help="contract details reopened per poll")
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--change-every", type=int, default=50, help="upload a document every N polls (0: never)")
+    args = parser.parse_args()
+
+    settings.admission_enabled = False
+    client = TestClient(app)
+    signup = {"username": f"poller{uuid.uuid4().hex[:8]}", "password": "testpass123"}
+    headers = {"Authorization": f"Bearer {client.post('/auth/signup', json=signup).json()['access_token']}"}
+    doc_ids = [upload(client, headers, i) for i in range(args.docs)]
+
+    for e in {engine, read_engine}:
+        event.listen(e, "before_cursor_execute", count_statement)
+
+    next_upload = args.docs
+    print(f"{'mode':<12} {'KiB received':>13} {'304s':>6} {'SQL/request':>12} {'ms/request':>11}")
+    for conditional in (False, True):
+        received, not_modified, sql, requests, elapsed, next_upload = poll(
+            client, headers, doc_ids[:args.details], args.polls, args.change_every, conditional, next_upload
+        )
+        print(f"{'If-None-Match' if conditional else 'full':<12} {received / 1024:>13.1f} {not_modified:>6} "
+              f"{sql / requests:>12.2f} {elapsed * 1000 / requests:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
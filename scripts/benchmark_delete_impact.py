@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Measure search latency while a large document is deleted.
+
+Seeds a throwaway tenant with one large document and one small one, times
+searches at rest, then soft-deletes the large document and keeps searching
+while its chunks are reclaimed in batches.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services.deletion import mark_documents_deleted, reclaim_document
+from app.services.embeddings import EMBEDDING_DIM
+from app.services.vector_store import get_vector_store
+
+
+def seed(db, user_id, chunks_per_doc):
+    db.execute(text("INSERT INTO users (user_id, username, password_hash) VALUES (:u, :name, 'x')"),
+               {"u": user_id, "name": f"bench-{user_id.hex[:8]}"})
+    doc_ids = []
+    for n in chunks_per_doc:
+        doc_id = uuid.uuid4()
+        doc_ids.append(doc_id)
+        db.execute(text("INSERT INTO documents (doc_id, user_id, filename, status, risk_score) "
+                        "VALUES (:d, :u, 'bench.txt', 'Active', 'Low')"), {"d": doc_id, "u": user_id})
+        db.execute(text(
+            """
+            INSERT INTO chunks (chunk_id, doc_id, user_id, text_chunk, embedding, chunk_metadata)
+            SELECT gen_random_uuid(), :d, :u, 'bench',
+                   ARRAY(SELECT random() * 2 - 1 FROM generate_series(1, :dim) WHERE gs > 0)::vector, '{}'
+            FROM generate_series(1, :n) AS gs
+            """
+        ), {"d": doc_id, "u": user_id, "n": n, "dim": EMBEDDING_DIM})
+    db.commit()
+    db.execute(text("ANALYZE chunks"))
+    return doc_ids
+
+
+def search_latencies(db, user_id, queries, stop=None):
+    store = get_vector_store()
+    latencies = []
+    i = 0
+    while (stop is None and i < len(queries)) or (stop is not None and not stop.is_set()):
+        start = time.perf_counter()
+        store.search(db, user_id, queries[i % len(queries)], 5)
+        db.rollback()
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+    return latencies
+
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<18} n={len(latencies):<6} p50={statistics.median(latencies):7.2f} ms  p95={p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--large", type=int, default=200_000, help="chunks in the deleted document")
+    parser.add_argument("--small", type=int, default=2_000, help="chunks in the surviving document")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    queries = np.random.default_rng(0).standard_normal((args.queries, EMBEDDING_DIM))
+    user_id = uuid.uuid4()
+    db = SessionLocal()
+    try:
+        large, _small = seed(db, user_id, [args.large, args.small])
+        report("at rest", search_latencies(db, user_id, queries))
+
+        mark_documents_deleted(db, user_id, [large])
+        stop = threading.Event()
+        reclaim_time = {}
+
+        def reclaim():
+            start = time.perf_counter()
+            reclaim_document(large)
+            reclaim_time["s"] = time.perf_counter() - start
+            stop.set()
+
+        worker = threading.Thread(target=reclaim)
+        worker.start()
+        report("during reclaim", search_latencies(db, user_id, queries, stop))
+        worker.join()
+        print(f"reclaimed {args.large} chunks in {reclaim_time['s']:.1f} s")
+    finally:
+        db.execute(text("DELETE FROM users WHERE user_id = :u"), {"u": user_id})
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
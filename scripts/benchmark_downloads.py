@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Throughput of GET /documents/{doc_id}/file under concurrent clients: full
+downloads (FileResponse) and 1 MiB Range requests at random offsets
+(BlobRangeResponse). Starts uvicorn on --port, uploads one --size-mb file
+and reports MB/s and latency per mode.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..', 'backend')
+RANGE_BYTES = 1 << 20
+
+
+def call(url, headers=None, data=None, method=None):
+    req = urllib.request.Request(url, data=data, headers=headers or {}, method=method)
+    with urllib.request.urlopen(req) as r:
+        return r.status, r.read()
+
+
+def wait_until_up(base, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            call(f"{base}/health")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("server did not start")
+
+
+def upload(base, token, size):
+    boundary = uuid.uuid4().hex
+    # Text so the upload is accepted without a parser; the bytes are what matter
+    content = (b"Confidential contract clause. " * (size // 30 + 1))[:size]
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.txt\"\r\n"
+        f"Content-Type: text/plain\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": f"multipart/form-data; boundary={boundary}"}
+    _, resp = call(f"{base}/documents/upload", headers, body, "POST")
+    return json.loads(resp)["doc_id"]
+
+
+def run(url, headers_for, requests, concurrency):
+    def one(i):
+        start = time.perf_counter()
+        status, data = call(url, headers_for(i))
+        assert status in (200, 206), status
+        return len(data), time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    total = sum(n for n, _ in results)
+    latencies = sorted(t * 1000 for _, t in results)
+    return total / elapsed / 2**20, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    env = dict(os.environ, ADMISSION_ENABLED="false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND, env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_up(base)
+        signup = json.dumps({"username": f"dl{uuid.uuid4().hex[:8]}", "password": "testpass123"}).encode()
+        _, resp = call(f"{base}/auth/signup", {"Content-Type": "application/json"}, signup, "POST")
+        token = json.loads(resp)["access_token"]
+        auth = {"Authorization": f"Bearer {token}"}
+        size = args.size_mb * 2**20
+        url = f"{base}/documents/{upload(base, token, size)}/file"
+
+        rng = random.Random(0)
+        offsets = [rng.randrange(0, size - RANGE_BYTES) for _ in range(args.requests)]
+        modes = {
+            "full": (lambda i: auth, max(args.requests // 10, args.concurrency)),
+            "range 1MiB": (lambda i: {**auth, "Range": f"bytes={offsets[i]}-{offsets[i] + RANGE_BYTES - 1}"}, args.requests),
+        }
+        print(f"{args.size_mb} MiB file, {args.concurrency} concurrent clients")
+        print(f"{'mode':<12} {'requests':>9} {'MB/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        for name, (headers_for, requests) in modes.items():
+            mbps, p50, p99 = run(url, headers_for, requests, args.concurrency)
+            print(f"{name:<12} {requests:>9} {mbps:>9.1f} {p50:>9.1f} {p99:>9.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Throughput and peak RSS of a full tenant export.
+
+Seeds a throwaway tenant with --chunks chunks spread over --docs documents
+(server-side, with generate_series), then runs the /documents/export body
+for --format in this process and reports rows/s, MB/s and peak RSS before
+and after the export.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services.embeddings import EMBEDDING_DIM
+from app.services.export import EXPORT_FORMATS, export_batches, parquet_available
+
+
+def peak_rss_mib():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def seed(db, user_id, docs, chunks):
+    db.execute(text("INSERT INTO users (user_id, username, password_hash) VALUES (:u, :name, 'x')"),
+               {"u": user_id, "name": f"bench-{user_id.hex[:8]}"})
+    db.execute(text(
+        """
+        INSERT INTO documents (doc_id, user_id, filename, status, risk_score, parties, contract_type)
+        SELECT gen_random_uuid(), :u, 'contract_' || gs || '.pdf', 'Active', 'Low', 'Acme Corp, Globex', 'Service Agreement'
+        FROM generate_series(1, :docs) AS gs
+        """
+    ), {"u": user_id, "docs": docs})
+    db.execute(text(
+        """
+        INSERT INTO chunks (chunk_id, doc_id, user_id, text_chunk, embedding, page, clause_type, confidence, chunk_metadata)
+        SELECT gen_random_uuid(), d.doc_id, :u,
+               'Either party may terminate this agreement with ninety days written notice, clause ' || gs,
+               ARRAY(SELECT random() * 2 - 1 FROM generate_series(1, :dim) WHERE gs > 0)::vector,
+               gs % 40 + 1, 'termination', 0.85, jsonb_build_object('contract_name', d.filename)
+        FROM (SELECT doc_id, filename, row_number() OVER () AS n FROM documents WHERE user_id = :u) AS d
+        JOIN generate_series(1, :chunks) AS gs ON gs % :docs = d.n - 1
+        """
+    ), {"u": user_id, "docs": docs, "chunks": chunks, "dim": EMBEDDING_DIM})
+    db.commit()
+    db.execute(text("ANALYZE documents"))
+    db.execute(text("ANALYZE chunks"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    args = parser.parse_args()
+    if args.format == "parquet" and not parquet_available():
+        sys.exit("Parquet export requires pyarrow")
+
+    user_id = uuid.uuid4()
+    db = SessionLocal()
+    try:
+        seed(db, user_id, args.docs, args.chunks)
+        write = EXPORT_FORMATS[args.format][0]
+        rss_before = peak_rss_mib()
+        rows = 0
+        size = 0
+
+        def counted(batches):
+            nonlocal rows
+            for batch in batches:
+                rows += len(batch)
+                yield batch
+
+        start = time.perf_counter()
+        for part in write(counted(export_batches(db, user_id))):
+            size += len(part)
+        elapsed = time.perf_counter() - start
+        db.rollback()
+
+        print(f"{args.format}: {rows} rows, {size / 2**20:.1f} MiB in {elapsed:.1f} s "
+              f"({rows / elapsed:.0f} rows/s, {size / 2**20 / elapsed:.1f} MiB/s)")
+        print(f"peak RSS {rss_before:.0f} MiB before export, {peak_rss_mib():.0f} MiB after")
+    finally:
+        db.execute(text("DELETE FROM users WHERE user_id = :u"), {"u": user_id})
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
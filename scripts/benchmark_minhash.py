@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark MinHash/LSH near-duplicate lookup on synthetic contracts built
+from llama_mock.MOCK_CONTRACT_CLAUSES variants. Compares LSH candidate
+lookup against a brute-force scan of every signature.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+
+from app.services import minhash
+from app.services.llama_mock import MOCK_CONTRACT_CLAUSES, MOCK_PARTIES
+
+FILLERS = {
+    "[Date]": lambda r: f"{r.randint(1, 28)} March {r.randint(2015, 2026)}",
+    "[Start Date]": lambda r: f"{r.randint(1, 28)} June {r.randint(2015, 2026)}",
+    "[Duration]": lambda r: f"{r.choice([12, 24, 36, 48])} months",
+    "[Jurisdiction]": lambda r: r.choice(["New York", "Delaware", "California", "England and Wales", "Ontario"]),
+    "Party A": lambda r: r.choice(MOCK_PARTIES).split(",")[0],
+    "Party B": lambda r: r.choice(MOCK_PARTIES).split(",")[1].strip(),
+}
+
+
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+QUALIFIERS = [
+    "subject to the terms of Schedule {n}",
+    "except as otherwise agreed in writing under Annex {n}",
+    "as further described in Exhibit {n} to this Agreement",
+    "notwithstanding anything to the contrary in Section {n}",
+]
+
+
+def make_templates(rng, n):
+    """Each template is a clause subset with its own figures and qualifiers"""
+    templates = []
+    for _ in range(n):
+        clauses = rng.sample(MOCK_CONTRACT_CLAUSES, rng.randint(8, len(MOCK_CONTRACT_CLAUSES)))
+        variant = []
+        for clause in clauses:
+            clause = NUMBER.sub(lambda m: str(rng.randint(1, 120)), clause)
+            qualifier = rng.choice(QUALIFIERS).format(n=rng.randint(1, 40))
+            variant.append(f"{clause.rstrip('.')}, {qualifier}.")
+        templates.append(variant)
+    return templates
+
+
+def make_document(rng, template):
+    clauses = list(template)
+    # Per-document edits: drop a clause now and then and fill placeholders
+    if len(clauses) > 8 and rng.random() < 0.3:
+        clauses.pop(rng.randrange(len(clauses)))
+    out = []
+    for clause in clauses:
+        for placeholder, fill in FILLERS.items():
+            if placeholder in clause:
+                clause = clause.replace(placeholder, fill(rng))
+        out.append(clause)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--templates", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    templates = make_templates(rng, args.templates)
+    start = time.perf_counter()
+    signatures = np.empty((args.docs, minhash.NUM_PERM), dtype=np.uint32)
+    index = minhash.LSHIndex()
+    for i in range(args.docs):
+        sig = minhash.signature(make_document(rng, rng.choice(templates)))
+        signatures[i] = sig
+        index.add(i, sig)
+    build = time.perf_counter() - start
+    print(f"indexed {args.docs} documents in {build:.1f} s ({args.docs / build:.0f} docs/s)")
+    print(f"signature size: {minhash.NUM_PERM * 4} bytes, bands: {minhash.NUM_BANDS} x {minhash.ROWS_PER_BAND}")
+
+    lsh_ms, brute_ms, recalls, candidates = [], [], [], []
+    for q in rng.sample(range(args.docs), args.queries):
+        sig = signatures[q]
+        start = time.perf_counter()
+        found = {k for k, _ in index.query(sig, args.threshold)}
+        lsh_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        sims = (signatures == sig).sum(axis=1) / minhash.NUM_PERM
+        expected = set(np.nonzero(sims >= args.threshold)[0].tolist())
+        brute_ms.append((time.perf_counter() - start) * 1000)
+
+        candidates.append(len(found))
+        recalls.append(len(found & expected) / len(expected))
+
+    print(f"LSH query p50:         {statistics.median(lsh_ms):.2f} ms (median {statistics.median(candidates):.0f} matches)")
+    print(f"brute-force query p50: {statistics.median(brute_ms):.2f} ms")
+    print(f"recall at Jaccard >= {args.threshold}: {statistics.mean(recalls):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compare full-precision and quantized (halfvec / binary) embedding indexes:
+index size, recall@k against exact search, and query latency.
+
+Runs against the chunks already in DATABASE_URL; builds every index mode
+it measures (each replacing the previous), so run it on a staging copy. Each query is the search path's
+own tenant-filtered statement, for the tenant owning the sampled chunk.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.services.quantization import QUANTIZATION_MODES, ensure_embedding_index, index_name, set_hnsw_search_params
+from app.services.vector_store import PgVectorStore
+
+store = PgVectorStore()
+
+
+def search(conn, mode, qvec, user_id, top_k):
+    params = {"qvec": qvec}
+    sql = text(store._top_k_sql(mode, "CAST(:qvec AS vector)", None, params, user_id, top_k))
+    with conn.begin():
+        set_hnsw_search_params(conn, params["candidates"])
+        return {r[0] for r in conn.execute(sql, params).all()}
+
+
+def exact_top_k(conn, qvec, user_id, top_k):
+    with conn.begin():
+        conn.execute(text("SET LOCAL enable_indexscan = off"))
+        rows = conn.execute(
+            text(
+                "SELECT chunk_id FROM chunks WHERE user_id = :user_id AND doc_id NOT IN "
+                "(SELECT doc_id FROM documents WHERE user_id = :user_id AND deleted_at IS NOT NULL) "
+                "ORDER BY embedding <=> CAST(:qvec AS vector) LIMIT :top_k"
+            ),
+            {"qvec": qvec, "user_id": user_id, "top_k": top_k},
+        ).all()
+    return {r[0] for r in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--factor", type=int, default=10, help="re-rank candidates = top_k * factor")
+    args = parser.parse_args()
+    settings.rerank_candidates_factor = args.factor
+
+    with engine.connect() as conn:
+        sample = conn.execute(
+            text("SELECT embedding::text, user_id FROM chunks ORDER BY random() LIMIT :n"), {"n": args.queries}
+        ).all()
+    if not sample:
+        print("❌ No chunks found; upload some documents first")
+        return
+    random.shuffle(sample)
+
+    with engine.connect() as conn:
+        truth = [exact_top_k(conn, qvec, user_id, args.top_k) for qvec, user_id in sample]
+
+    print(f"{'mode':<8} {'index size':>12} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode in QUANTIZATION_MODES:
+        ensure_embedding_index(engine, mode)
+        with engine.connect() as conn:
+            size = conn.execute(
+                text("SELECT pg_size_pretty(pg_relation_size(CAST(:name AS regclass)))"), {"name": index_name(mode)}
+            ).scalar()
+            conn.commit()
+            latencies, hits = [], 0
+            for (qvec, user_id), expected in zip(sample, truth):
+                start = time.perf_counter()
+                found = search(conn, mode, qvec, user_id, args.top_k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(found & expected)
+        recall = hits / sum(len(t) for t in truth)
+        p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+        print(f"{mode:<8} {size:>12} {recall:>9.3f} {statistics.median(latencies):>8.2f} {p95:>8.2f}")
+
+    # Building each mode's index dropped the others; put the configured one back
+    ensure_embedding_index(engine, settings.embedding_quantization)
+
+
+if __name__ == "__main__":
+    main()
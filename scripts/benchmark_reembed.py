@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Measure re-embedding throughput and its effect on search latency.
+
+Seeds a throwaway tenant on the legacy model, times searches at rest, then
+re-embeds its chunks with --model in a background thread (the same batches
+and pauses as the background job) while searching, and times searches again
+after the cutover to the new model.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.services.embeddings import EMBEDDING_MODELS, LEGACY_MODEL, get_embedding_model, vector_array_literal
+from app.services.quantization import ensure_embedding_index
+from app.services.reembedding import active_embedding_model, reembed_batch
+from app.services.vector_store import get_vector_store
+
+WORDS = ("termination", "notice", "liability", "indemnify", "payment", "invoice", "confidential",
+         "license", "warranty", "governing", "law", "party", "agreement", "days", "renewal")
+
+
+def seed(db, user_id, n_chunks):
+    db.execute(text("INSERT INTO users (user_id, username, password_hash) VALUES (:u, :name, 'x')"),
+               {"u": user_id, "name": f"bench-{user_id.hex[:8]}"})
+    doc_id = uuid.uuid4()
+    db.execute(text("INSERT INTO documents (doc_id, user_id, filename, status, risk_score) "
+                    "VALUES (:d, :u, 'bench.txt', 'Active', 'Low')"), {"d": doc_id, "u": user_id})
+    rng = random.Random(0)
+    for offset in range(0, n_chunks, 5_000):
+        texts = [" ".join(rng.choices(WORDS, k=30)) for _ in range(min(5_000, n_chunks - offset))]
+        db.execute(text(
+            """
+            INSERT INTO chunks (chunk_id, doc_id, user_id, text_chunk, embedding)
+            SELECT gen_random_uuid(), :d, :u, t.text_chunk, t.embedding
+            FROM unnest(CAST(:texts AS text[]), CAST(:embeddings AS vector[])) AS t(text_chunk, embedding)
+            """
+        ), {"d": doc_id, "u": user_id, "texts": texts,
+            "embeddings": vector_array_literal(LEGACY_MODEL.embed_batch(texts))})
+    db.commit()
+    db.execute(text("ANALYZE chunks"))
+
+
+def search_latencies(db, user_id, queries, stop=None):
+    latencies = []
+    i = 0
+    while (stop is None and i < len(queries)) or (stop is not None and not stop.is_set()):
+        start = time.perf_counter()
+        # Resolved per query, as /query/search does
+        model = active_embedding_model(db, user_id)
+        get_vector_store(model.model_id).search(db, user_id, model.embed(queries[i % len(queries)]), 5)
+        db.rollback()
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+    return latencies
+
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    print(f"{label:<18} n={len(latencies):<6} p50={statistics.median(latencies):7.2f} ms  p95={p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--model", default="trigram-v2",
+                        choices=sorted(m for m in EMBEDDING_MODELS if m != LEGACY_MODEL.model_id))
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    model = get_embedding_model(args.model)
+    rng = random.Random(1)
+    queries = [" ".join(rng.choices(WORDS, k=4)) for _ in range(args.queries)]
+    user_id = uuid.uuid4()
+    ensure_embedding_index(engine, settings.embedding_quantization)
+    db = SessionLocal()
+    try:
+        seed(db, user_id, args.chunks)
+        report("at rest", search_latencies(db, user_id, queries))
+
+        db.execute(text("INSERT INTO tenant_embedding_state (user_id, target_model) VALUES (:u, :m)"),
+                   {"u": user_id, "m": model.model_id})
+        db.commit()
+        stop = threading.Event()
+        result = {}
+
+        def backfill():
+            start = time.perf_counter()
+            embedded = 0
+            with engine.connect() as conn:
+                # None once the tenant has been cut over
+                while (n := reembed_batch(conn, user_id, settings.reembed_batch_size)) is not None:
+                    embedded += n
+                    time.sleep(settings.reembed_batch_pause_ms / 1000)
+            result["embedded"], result["s"] = embedded, time.perf_counter() - start
+            stop.set()
+
+        worker = threading.Thread(target=backfill)
+        worker.start()
+        report("during backfill", search_latencies(db, user_id, queries, stop))
+        worker.join()
+        print(f"re-embedded {result['embedded']} chunks with {model.model_id} in {result['s']:.1f} s "
+              f"({result['embedded'] / max(result['s'], 1e-9):.0f} chunks/s, batch {settings.reembed_batch_size}, "
+              f"pause {settings.reembed_batch_pause_ms} ms)")
+        assert active_embedding_model(db, user_id) is model
+        report("after cutover", search_latencies(db, user_id, queries))
+    finally:
+        db.execute(text("DELETE FROM users WHERE user_id = :u"), {"u": user_id})
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-byte and total time of POST /query/search (buffered) versus
+POST /query/search/stream (NDJSON) at several top_k values.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.llama_mock import MOCK_CONTRACT_CLAUSES
+
+
+def timed(client, path, headers, body):
+    start = time.perf_counter()
+    first = None
+    with client.stream("POST", path, headers=headers, json=body) as response:
+        for _ in response.iter_bytes():
+            if first is None:
+                first = time.perf_counter() - start
+    return first * 1000, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    signup = {"username": f"stream{uuid.uuid4().hex[:8]}", "password": "testpass123"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for i in range(args.docs):
+        body = "\n".join(f"{c} Ref {i}-{j}." for j, c in enumerate(MOCK_CONTRACT_CLAUSES))
+        client.post("/documents/upload", headers=headers, files={"file": (f"c{i}.txt", body, "text/plain")})
+
+    print(f"{'top_k':>6} {'endpoint':<10} {'TTFB p50 ms':>12} {'total p50 ms':>13}")
+    for top_k in args.top_k:
+        body = {"query": "termination notice period", "top_k": top_k}
+        for name, path in (("buffered", "/query/search"), ("stream", "/query/search/stream")):
+            runs = [timed(client, path, headers, body) for _ in range(args.rounds)]
+            ttfb = statistics.median(r[0] for r in runs)
+            total = statistics.median(r[1] for r in runs)
+            print(f"{top_k:>6} {name:<10} {ttfb:>12.2f} {total:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Upload a corpus with a realistic share of byte-identical re-uploads and
+report how much ingestion work content-hash deduplication saved.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.llama_mock import MOCK_CONTRACT_CLAUSES
+
+
+def make_contract(rng):
+    clauses = rng.sample(MOCK_CONTRACT_CLAUSES, rng.randint(6, len(MOCK_CONTRACT_CLAUSES)))
+    return "\n".join(f"{c} Ref {rng.randint(0, 10**9)}." for c in clauses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=500)
+    parser.add_argument("--duplicate-rate", type=float, default=0.3, help="share of uploads that repeat an earlier file")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    client = TestClient(app)
+    signup = {"username": f"dedup{uuid.uuid4().hex[:8]}", "password": "testpass123"}
+    token = client.post("/auth/signup", json=signup).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    corpus = []
+    timings = {False: [], True: []}
+    chunks_inserted = 0
+    for i in range(args.uploads):
+        if corpus and rng.random() < args.duplicate_rate:
+            body = rng.choice(corpus)
+        else:
+            body = make_contract(rng)
+            corpus.append(body)
+        files = {"file": (f"contract_{i}.txt", body, "text/plain")}
+        start = time.perf_counter()
+        result = client.post("/documents/upload", headers=headers, files=files).json()
+        timings[result["duplicate"]].append((time.perf_counter() - start) * 1000)
+        chunks_inserted += result["chunks_inserted"]
+
+    unique, dupes = timings[False], timings[True]
+    avg_chunks = chunks_inserted / max(len(unique), 1)
+    print(f"uploads: {args.uploads}  unique: {len(unique)}  duplicates: {len(dupes)}")
+    print(f"unique upload p50:    {statistics.median(unique):.2f} ms")
+    if dupes:
+        print(f"duplicate upload p50: {statistics.median(dupes):.2f} ms")
+    print(f"chunks parsed/embedded/inserted: {chunks_inserted}, skipped: ~{avg_chunks * len(dupes):.0f}")
+    saved = sum(unique) / max(len(unique), 1) * len(dupes) - sum(dupes)
+    print(f"ingestion time saved: ~{saved / 1000:.1f} s of {(sum(unique) + sum(dupes)) / 1000 + saved / 1000:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
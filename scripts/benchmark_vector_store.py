@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vector store backends at 10k / 100k / 1M vectors per tenant.
+
+The NumPy backend runs without a database. Pass --pgvector to also seed a
+throwaway tenant in DATABASE_URL and time PgVectorStore on the same sizes.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import numpy as np
+
+from app.services.embeddings import EMBEDDING_DIM
+from app.services.vector_store import NumpyVectorStore, VectorItem
+
+SIZES = (10_000, 100_000, 1_000_000)
+BATCH = 10_000
+
+
+def time_queries(store, db, user_id, queries, top_k):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        store.search(db, user_id, q, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def bench_numpy(sizes, queries, top_k):
+    print(f"NumPy backend (dim={EMBEDDING_DIM})")
+    print(f"{'vectors':>10} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as root:
+        store = NumpyVectorStore(root)
+        for n in sizes:
+            user_id = uuid.uuid4()
+            doc_id = uuid.uuid4()
+            start = time.perf_counter()
+            store.reset(user_id)  # a new tenant, rather than one to build from Postgres
+            for offset in range(0, n, BATCH):
+                rows = rng.standard_normal((min(BATCH, n - offset), EMBEDDING_DIM))
+                store.add(None, user_id, [VectorItem(uuid.uuid4(), doc_id, r) for r in rows])
+            load = time.perf_counter() - start
+            p50, p95 = time_queries(store, None, user_id, queries, top_k)
+            print(f"{n:>10} {load:>8.1f} {p50:>8.2f} {p95:>8.2f}")
+
+
+def bench_pgvector(sizes, queries, top_k):
+    from sqlalchemy import text
+    from app.database import SessionLocal
+    from app.services.vector_store import PgVectorStore
+
+    print("pgvector backend")
+    print(f"{'vectors':>10} {'load s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    store = PgVectorStore()
+    db = SessionLocal()
+    try:
+        for n in sizes:
+            user_id, doc_id = uuid.uuid4(), uuid.uuid4()
+            start = time.perf_counter()
+            db.execute(text("INSERT INTO users (user_id, username, password_hash) VALUES (:u, :name, 'x')"),
+                       {"u": user_id, "name": f"bench-{user_id.hex[:8]}"})
+            db.execute(text("INSERT INTO documents (doc_id, user_id, filename, status, risk_score) "
+                            "VALUES (:d, :u, 'bench.txt', 'Active', 'Low')"), {"d": doc_id, "u": user_id})
+            db.execute(text(
+                """
+                INSERT INTO chunks (chunk_id, doc_id, user_id, text_chunk, embedding, chunk_metadata)
+                SELECT gen_random_uuid(), :d, :u, 'bench',
+                       ARRAY(SELECT random() * 2 - 1 FROM generate_series(1, :dim) WHERE gs > 0)::vector, '{}'
+                FROM generate_series(1, :n) AS gs
+                """
+            ), {"d": doc_id, "u": user_id, "n": n, "dim": EMBEDDING_DIM})
+            db.commit()
+            db.execute(text("ANALYZE chunks"))
+            load = time.perf_counter() - start
+            p50, p95 = time_queries(store, db, user_id, queries, top_k)
+            print(f"{n:>10} {load:>8.1f} {p50:>8.2f} {p95:>8.2f}")
+            db.execute(text("DELETE FROM users WHERE user_id = :u"), {"u": user_id})
+            db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--pgvector", action="store_true", help="also benchmark PgVectorStore against DATABASE_URL")
+    args = parser.parse_args()
+
+    queries = np.random.default_rng(1).standard_normal((args.queries, EMBEDDING_DIM))
+    bench_numpy(args.sizes, queries, args.top_k)
+    if args.pgvector:
+        bench_pgvector(args.sizes, queries, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
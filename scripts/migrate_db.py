@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Apply database migrations (alembic upgrade head) and create the embedding
+index for EMBEDDING_QUANTIZATION. Run once per deploy, before starting or
+restarting API workers. A database created by the old create_all startup
+path is stamped at the initial revision first.
+"""
+import os
+import sys
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.database import current_schema_version, engine, migrate_db
+
+
+def main():
+    migrate_db()
+    with engine.connect() as conn:
+        print(f"Database schema at revision {current_schema_version(conn)}")
+
+
+if __name__ == "__main__":
+    main()
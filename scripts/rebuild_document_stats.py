@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-tenant dashboard counters (document_stats) from documents.
+Run once after deploying GET /documents/stats on an existing database, or to
+repair counters.
+"""
+import sys
+import os
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.database import SessionLocal
+from app import models
+from app.services.stats import rebuild_document_stats
+
+
+def main():
+    db = SessionLocal()
+    try:
+        user_ids = [u for (u,) in db.query(models.User.user_id).all()]
+        for user_id in user_ids:
+            rebuild_document_stats(db, user_id)
+            db.commit()
+        print(f'✅ Rebuilt document stats for {len(user_ids)} tenants')
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Re-embed every tenant with an embedding model and cut each one over when
+its backfill completes; what the API workers' background job does a few
+batches at a time, run here to completion. Reports throughput.
+
+Set EMBEDDING_MODEL to the same model on the API workers, or their job will
+retarget tenants at the model they are configured with.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.config import settings
+from app.database import engine
+from app.services.embeddings import EMBEDDING_MODELS, get_embedding_model
+from app.services.reembedding import reembed_all
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=settings.embedding_model, choices=sorted(EMBEDDING_MODELS))
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    model = get_embedding_model(args.model)
+    start = time.perf_counter()
+    tenants = set()
+
+    def progress(user_id, n):
+        tenants.add(user_id)
+        elapsed = time.perf_counter() - start
+        print(f"tenant {user_id}: +{n} chunks ({elapsed:.1f} s)")
+
+    with engine.connect() as conn:
+        embedded = reembed_all(conn, model, args.max_batches, on_batch=progress)
+    elapsed = time.perf_counter() - start
+    print(f"Re-embedded {embedded} chunks for {len(tenants)} tenants with {model.model_id} "
+          f"in {elapsed:.1f} s ({embedded / max(elapsed, 1e-9):.0f} chunks/s)")
+
+
+if __name__ == "__main__":
+    main()
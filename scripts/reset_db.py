@@ -8,7 +8,7 @@ import os
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from app.database import engine, Base
+from app.database import engine, Base, migrate_db
 from app import models
 import sqlalchemy
 
@@ -17,15 +17,13 @@ def reset_database():
     try:
         # Drop all tables
         Base.metadata.drop_all(bind=engine)
-        print('✅ Dropped all tables')
-
-        # Create vector extension and recreate tables
         with engine.connect() as conn:
-            conn.execute(sqlalchemy.text('CREATE EXTENSION IF NOT EXISTS vector'))
+            conn.execute(sqlalchemy.text('DROP TABLE IF EXISTS alembic_version'))
             conn.commit()
-            print('✅ Created vector extension')
+        print('✅ Dropped all tables')
 
-        Base.metadata.create_all(bind=engine)
+        # Recreate the schema from the migrations
+        migrate_db()
         print('✅ Created all tables with updated schema')
         print('🎉 Database reset completed successfully!')
         
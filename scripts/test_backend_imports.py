@@ -13,7 +13,7 @@ try:
     from app.main import app
     print("✅ Main app imported successfully")
     
-    from app.database import get_db, init_db
+    from app.database import current_schema_version, engine, get_db, schema_head
     print("✅ Database functions imported successfully")
     
     from app import models
@@ -28,8 +28,9 @@ try:
     print(f"JWT Secret configured: {'Yes' if settings.jwt_secret else 'No'}")
     
     # Test database connection
-    init_db()
-    print("✅ Database initialized successfully")
+    with engine.connect() as conn:
+        version = current_schema_version(conn)
+    print(f"✅ Database connected, schema at {version} (latest {schema_head()})")
     
 except Exception as e:
     print(f"❌ Import/initialization failed: {e}")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test read-replica routing against a primary (DATABASE_URL) and a streaming
+replica (DATABASE_READ_URL): where each session factory connects, and that
+a tenant sees its own upload and delete straight away (read-your-writes)
+even though list/detail/search read from the replica.
+"""
+import sys
+import os
+import time
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+try:
+    import sqlalchemy
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.config import settings
+    from app.database import ReadSessionLocal, SessionLocal, read_engine, engine
+
+    if read_engine is engine:
+        print("⚠️  DATABASE_READ_URL is not set; reads use the primary")
+
+    for name, factory in (("primary", SessionLocal), ("read", ReadSessionLocal)):
+        with factory() as db:
+            port, replica = db.execute(sqlalchemy.text("SELECT inet_server_port(), pg_is_in_recovery()")).one()
+            print(f"{name:<8} sessions -> port {port}, in recovery: {replica}")
+
+    client = TestClient(app)
+    signup_data = {"username": f"replica{uuid.uuid4().hex[:8]}", "password": "testpass123"}
+    token = client.post("/auth/signup", json=signup_data).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    body = "MASTER SERVICE AGREEMENT\nTERMINATION: Either party may terminate this agreement with 90 days written notice.\n" * 3
+    uploaded = client.post("/documents/upload", headers=headers, files={"file": ("replica.txt", body, "text/plain")})
+    doc_id = uploaded.json()["doc_id"]
+    print(f"Write marker after upload: {uploaded.headers.get('X-Write-LSN')}")
+
+    listed = [d["doc_id"] for d in client.get("/documents/list", headers=headers).json()]
+    print(f"{'✅' if doc_id in listed else '❌'} Upload visible in list straight after upload")
+    detail = client.get(f"/documents/{doc_id}", headers=headers)
+    print(f"{'✅' if detail.status_code == 200 else '❌'} Detail straight after upload: {detail.status_code}")
+
+    client.delete(f"/documents/{doc_id}", headers=headers)
+    listed = [d["doc_id"] for d in client.get("/documents/list", headers=headers).json()]
+    print(f"{'✅' if doc_id not in listed else '❌'} Delete visible in list straight after delete")
+
+    print(f"Waiting {settings.read_your_writes_seconds}s for the write marker to expire...")
+    time.sleep(settings.read_your_writes_seconds + 0.5)
+    results = client.post("/query/search", headers=headers, json={"query": "termination notice", "top_k": 5})
+    print(f"{'✅' if results.status_code == 200 else '❌'} Search from the replica: {results.status_code}")
+
+except Exception as e:
+    print(f"❌ Read replica test failed: {e}")
+    import traceback
+    traceback.print_exc()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test uploads while a tenant is being re-embedded and after its cutover: the
+upload succeeds and its chunks get embeddings for every model it writes
+(the active one and the backfill target).
+"""
+import sys
+import os
+import uuid
+
+# Add the backend directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+try:
+    from sqlalchemy import text
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.database import SessionLocal
+    from app.services.embeddings import EMBEDDING_MODELS
+
+    model_id = next(m.model_id for m in EMBEDDING_MODELS.values() if not m.legacy)
+    client = TestClient(app)
+
+    signup_data = {"username": f"reembed{uuid.uuid4().hex[:8]}", "password": "testpass123"}
+    token = client.post("/auth/signup", json=signup_data).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def set_state(db, user_id, active, target):
+        db.execute(
+            text(
+                """
+                INSERT INTO tenant_embedding_state (user_id, active_model, target_model) VALUES (:u, :a, :t)
+                ON CONFLICT (user_id) DO UPDATE SET active_model = :a, target_model = :t
+                """
+            ),
+            {"u": user_id, "a": active, "t": target},
+        )
+        db.commit()
+
+    def upload(label):
+        body = f"MASTER SERVICE AGREEMENT {label}\nTERMINATION: Either party may terminate with 90 days notice.\n" * 3
+        return client.post("/documents/upload", headers=headers, files={"file": (f"{label}.txt", body, "text/plain")})
+
+    # The first upload runs on the legacy model and tells us the tenant
+    first = upload("legacy")
+    print(f"{'✅' if first.status_code == 200 else '❌'} Upload on the legacy model: {first.status_code}")
+    with SessionLocal() as db:
+        user_id = db.execute(text("SELECT user_id FROM documents WHERE doc_id = :d"), {"d": first.json()["doc_id"]}).scalar()
+
+    for label, active, target in (("backfill", "hash-v1", model_id), ("active", model_id, None)):
+        with SessionLocal() as db:
+            set_state(db, user_id, active, target)
+        response = upload(label)
+        if response.status_code != 200:
+            print(f"❌ Upload with {model_id} {label}: {response.status_code} {response.text}")
+            continue
+        doc_id = response.json()["doc_id"]
+        with SessionLocal() as db:
+            chunks, embedded = db.execute(
+                text(
+                    """
+                    SELECT count(*), count(e.chunk_id) FROM chunks c
+                    LEFT JOIN chunk_embeddings e ON e.chunk_id = c.chunk_id AND e.model_id = :m
+                    WHERE c.doc_id = :d
+                    """
+                ),
+                {"m": model_id, "d": doc_id},
+            ).one()
+        ok = chunks > 0 and embedded == chunks
+        print(f"{'✅' if ok else '❌'} Upload with {model_id} {label}: {embedded}/{chunks} chunks embedded")
+
+except Exception as e:
+    print(f"❌ Re-embedding upload test failed: {e}")
+    import traceback
+    traceback.print_exc()
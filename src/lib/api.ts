@@ -28,6 +28,7 @@ export async function apiSignup(username: string, password: string) {
 export async function apiListDocuments() {
   const res = await fetch(`${API_BASE}/documents/list`, {
     headers: { ...authHeaders() },
+    credentials: "include",
   });
   if (!res.ok) throw new Error("Failed to load documents");
   return res.json();
@@ -40,6 +41,7 @@ export async function apiUpload(file: File) {
     method: "POST",
     headers: { ...authHeaders() },
     body: form,
+    credentials: "include",
   });
   if (!res.ok) throw new Error("Upload failed");
   return res.json();
@@ -50,6 +52,7 @@ export async function apiQuery(query: string, top_k = 5) {
     method: "POST",
     headers: { "Content-Type": "application/json", ...authHeaders() },
     body: JSON.stringify({ query, top_k }),
+    credentials: "include",
   });
   if (!res.ok) throw new Error("Query failed");
   return res.json();
@@ -58,6 +61,7 @@ export async function apiQuery(query: string, top_k = 5) {
 export async function apiGetContractDetail(docId: string) {
   const res = await fetch(`${API_BASE}/documents/${docId}`, {
     headers: { ...authHeaders() },
+    credentials: "include",
   });
   if (!res.ok) throw new Error("Failed to load contract details");
   return res.json();